@@ -0,0 +1,276 @@
+# Micro-benchmarks لدوال database.py: كل دالة على أحجام مختلفة لجدول users وبمستويات تزامن مختلفة.
+# النتيجة JSON بترتيب ثابت، فيمكن مقارنة ملفين من commitين مختلفين مباشرة (أو عبر --compare).
+#
+#   python benchmarks/db_helpers.py                                   # SQLite مؤقت، 1k و 100k مستخدم
+#   python benchmarks/db_helpers.py --sizes 1000,1000000,10000000 -c 1,10,100 --json after.json
+#   python benchmarks/db_helpers.py --helpers get_user,add_xp --compare before.json
+#   python benchmarks/db_helpers.py --postgres postgresql://localhost/thex_bench   # قاعدة بيانات تجريبية فقط!
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import database
+from metrics import Histogram
+
+GUILD_ID = 900000000000000001
+MODERATOR_ID = 900000000000000002
+FIRST_USER_ID = 920000000000000000
+SEED_ALIASES = 20 # عدد الـ aliases في السيرفر التجريبي
+WARNING_EVERY = 10 # عضو واحد من كل 10 عليه تحذير مسبق
+SEED_CHUNK = 500000 # صفوف لكل استعلام أثناء التعبئة
+
+# --- Workloads: كل واحدة تنفذ عملية واحدة على مستخدم عشوائي من الجدول ---
+
+class Workload:
+    def __init__(self, rng):
+        self.rng = rng
+        self.size = 0
+        # مستخدمون جدد فعلاً حتى مع إعادة التشغيل على نفس قاعدة PostgreSQL
+        self.next_new_user = FIRST_USER_ID + (int(time.time() * 1000) << 16)
+
+    def existing_user(self):
+        return FIRST_USER_ID + self.rng.randrange(self.size)
+
+    async def get_user(self):
+        await database.get_user(self.existing_user())
+
+    async def create_user(self):
+        self.next_new_user += 1
+        await database.create_user(self.next_new_user)
+
+    async def update_credits(self):
+        await database.update_credits(self.existing_user(), 1)
+
+    async def add_xp(self):
+        await database.add_xp(self.existing_user(), 5)
+
+    async def get_aliases(self):
+        await database.get_aliases(GUILD_ID)
+
+    async def add_warning(self):
+        await database.add_warning(GUILD_ID, self.existing_user(), MODERATOR_ID, 'benchmark')
+
+    async def get_warnings(self):
+        await database.get_warnings(GUILD_ID, self.existing_user())
+
+    async def get_and_increment_ticket_count(self):
+        await database.get_and_increment_ticket_count(GUILD_ID)
+
+HELPERS = [
+    'get_user', 'create_user', 'update_credits', 'add_xp', 'get_aliases',
+    'add_warning', 'get_warnings', 'get_and_increment_ticket_count'
+]
+
+# --- Seeding ---
+
+async def count_rows(query, *args):
+    row = await database.db_manager.fetchone(query, *args)
+    return row['n']
+
+async def seed_users(target):
+    # توليد الصفوف داخل قاعدة البيانات نفسها، فـ 10M صف لا تمر عبر Python
+    current = await count_rows('SELECT COUNT(*) AS n FROM users WHERE user_id >= ? AND user_id < ?', FIRST_USER_ID, FIRST_USER_ID + target)
+    for start in range(current, target, SEED_CHUNK):
+        end = min(start + SEED_CHUNK, target) - 1
+        if database.db_manager.is_pg:
+            await database.db_manager.execute('''
+                INSERT INTO users (user_id, credits, xp, level)
+                SELECT ?::bigint + n, n % 1000, n % 5000, n % 50 FROM generate_series(?::bigint, ?::bigint) AS n
+                ON CONFLICT DO NOTHING
+            ''', FIRST_USER_ID, start, end)
+        else:
+            await database.db_manager.execute('''
+                WITH RECURSIVE seq(n) AS (SELECT ? UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+                INSERT OR IGNORE INTO users (user_id, credits, xp, level)
+                SELECT ? + n, n % 1000, n % 5000, n % 50 FROM seq
+            ''', start, end, FIRST_USER_ID)
+
+async def seed_warnings(target):
+    # تحذير لكل عضو WARNING_EVERY، حتى يكون حجم جدول التحذيرات متناسباً مع عدد المستخدمين
+    wanted = target // WARNING_EVERY
+    current = await count_rows("SELECT COUNT(*) AS n FROM warnings WHERE guild_id = ? AND reason = 'seed'", GUILD_ID)
+    timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    for start in range(current, wanted, SEED_CHUNK):
+        end = min(start + SEED_CHUNK, wanted) - 1
+        if database.db_manager.is_pg:
+            await database.db_manager.execute('''
+                INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp)
+                SELECT ?::bigint, ?::bigint + n * ?, ?::bigint, 'seed', ? FROM generate_series(?::bigint, ?::bigint) AS n
+            ''', GUILD_ID, FIRST_USER_ID, WARNING_EVERY, MODERATOR_ID, timestamp, start, end)
+        else:
+            await database.db_manager.execute('''
+                WITH RECURSIVE seq(n) AS (SELECT ? UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+                INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp)
+                SELECT ?, ? + n * ?, ?, 'seed', ? FROM seq
+            ''', start, end, GUILD_ID, FIRST_USER_ID, WARNING_EVERY, MODERATOR_ID, timestamp)
+
+async def seed(size):
+    start = time.perf_counter()
+    await seed_users(size)
+    await seed_warnings(size)
+    for i in range(SEED_ALIASES):
+        await database.add_alias(GUILD_ID, f'alias{i}', 'ping')
+    if not database.db_manager.is_pg:
+        # تحديث إحصائيات الـ query planner بعد إضافة ملايين الصفوف
+        await database.db_manager.execute('ANALYZE')
+    else:
+        await database.db_manager.execute('ANALYZE users')
+        await database.db_manager.execute('ANALYZE warnings')
+    print(f"Seeded {size} users in {time.perf_counter() - start:.1f}s")
+
+# --- Runner ---
+
+async def run_case(workload, helper, size, concurrency, ops):
+    operation = getattr(workload, helper)
+    histogram = Histogram()
+    remaining = ops
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            op_start = time.perf_counter()
+            await operation()
+            histogram.observe(time.perf_counter() - op_start)
+
+    await database.counter_buffer.flush()
+    database.query_profiler.reset()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    # update_credits و add_xp تُكتب لاحقاً على دفعات، فزمن الكتابة الفعلية جزء من النتيجة
+    await database.counter_buffer.flush()
+    elapsed = time.perf_counter() - start
+
+    queries = sum(stats.latency.count for stats in database.query_profiler.stats.values())
+    return {
+        'helper': helper,
+        'size': size,
+        'concurrency': concurrency,
+        'ops': ops,
+        'seconds': round(elapsed, 4),
+        'ops_per_sec': round(ops / elapsed, 1),
+        'p50_ms': round(histogram.percentile(50) * 1000, 3),
+        'p90_ms': round(histogram.percentile(90) * 1000, 3),
+        'p99_ms': round(histogram.percentile(99) * 1000, 3),
+        'max_ms': round(histogram.max * 1000, 3),
+        'queries_per_op': round(queries / ops, 3),
+    }
+
+def case_key(result):
+    return (result['helper'], result['size'], result['concurrency'])
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_result(result):
+    print(
+        f"  {result['helper']:<32} size={result['size']:<9} c={result['concurrency']:<4} "
+        f"{result['ops_per_sec']:>10} ops/s  p50={result['p50_ms']}ms p99={result['p99_ms']}ms  q/op={result['queries_per_op']}"
+    )
+
+def print_comparison(old_path, results):
+    with open(old_path, encoding='utf-8') as f:
+        old = {case_key(item): item for item in json.load(f)['results']}
+    print(f"\nCompared with {old_path}:")
+    for result in results:
+        before = old.get(case_key(result))
+        if not before:
+            continue
+        speed = (result['ops_per_sec'] / before['ops_per_sec'] - 1) * 100 if before['ops_per_sec'] else 0
+        p99 = (result['p99_ms'] / before['p99_ms'] - 1) * 100 if before['p99_ms'] else 0
+        print(f"  {result['helper']:<32} size={result['size']:<9} c={result['concurrency']:<4} ops/s {speed:+.1f}%  p99 {p99:+.1f}%")
+
+async def run(args):
+    rng = random.Random(args.seed)
+    tmpdir = None
+    if args.postgres:
+        database.DATABASE_URL = args.postgres
+        database.db_manager.is_pg = True
+    else:
+        # حتى لو كان DATABASE_URL في .env، الـ benchmark لا يلمس قاعدة بيانات حقيقية
+        tmpdir = tempfile.mkdtemp(prefix='thex-bench-')
+        database.DATABASE_URL = None
+        database.db_manager.is_pg = False
+        database.DB_PATH = os.path.join(tmpdir, 'bench.db')
+    if 'SLOW_QUERY_MS' not in os.environ:
+        database.SLOW_QUERY_MS = float('inf')
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    levels = [int(level) for level in args.concurrency.split(',')]
+    helpers = args.helpers.split(',') if args.helpers else HELPERS
+    for helper in helpers:
+        if helper not in HELPERS:
+            raise SystemExit(f"Unknown helper: {helper} (choose from {', '.join(HELPERS)})")
+
+    workload = Workload(rng)
+    results = []
+    try:
+        await database.init_db()
+        # الأحجام تصاعدية، فكل حجم يكمل تعبئة الحجم الذي قبله
+        for size in sizes:
+            await seed(size)
+            workload.size = size
+            print(f"\n== {size} users ({'postgres' if database.db_manager.is_pg else 'sqlite'}) ==")
+            for helper in helpers:
+                for concurrency in levels:
+                    result = await run_case(workload, helper, size, concurrency, args.ops)
+                    results.append(result)
+                    print_result(result)
+    finally:
+        await database.close_db()
+        if tmpdir:
+            for filename in os.listdir(tmpdir):
+                os.remove(os.path.join(tmpdir, filename))
+            os.rmdir(tmpdir)
+
+    results.sort(key=case_key)
+    report = {
+        'meta': {
+            'backend': 'postgres' if args.postgres else 'sqlite',
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'ops': args.ops,
+            'seed': args.seed,
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nResults written to {args.json}")
+    if args.compare:
+        print_comparison(args.compare, results)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the database.py helpers at several table sizes and concurrency levels.')
+    parser.add_argument('--sizes', default='1000,100000', help='comma separated users table sizes (up to 10000000)')
+    parser.add_argument('-c', '--concurrency', default='1,10,100', help='comma separated numbers of concurrent callers')
+    parser.add_argument('--helpers', help=f"comma separated subset of: {', '.join(HELPERS)}")
+    parser.add_argument('--ops', type=int, default=2000, help='operations per helper, size and concurrency level')
+    parser.add_argument('--postgres', help='DSN of a throwaway PostgreSQL database (default: temp SQLite file)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--compare', help='previous --json output to compare against')
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,502 @@
+# Offline benchmark: يشغل MyBot والإضافات الحقيقية بدون شبكة، ويمرر أحداث gateway مصطنعة
+# (أو مسجلة) ثم يقيس الأحداث/الثانية، p99 لكل listener، عدد الاستعلامات لكل حدث وأعلى RSS.
+#
+#   python benchmarks/replay.py                              # كل السيناريوهات على ملف SQLite مؤقت
+#   python benchmarks/replay.py -s message_flood -n 20000
+#   python benchmarks/replay.py --postgres postgresql://localhost/thex_bench   # قاعدة بيانات تجريبية فقط!
+#   python benchmarks/replay.py --replay events.jsonl        # كل سطر: {"t": "MESSAGE_CREATE", "d": {...}}
+#   python benchmarks/replay.py --json results.json          # لمقارنة النتائج بين التعديلات
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import discord
+from discord.webhook import async_ as webhook_async
+from PIL import Image
+import database
+import metrics
+
+SCENARIOS = ['message_flood', 'edit_delete_storm', 'join_wave', 'voice_churn', 'ticket_opens']
+DRAIN_PREFIXES = ('discord.py: ', 'discord-ui-view-dispatch-')
+
+GUILD_ID = 900000000000000001
+BOT_ID = 900000000000000002
+STAFF_ROLE_ID = 900000000000000010
+BOT_ROLE_ID = 900000000000000011
+GENERAL_ID = 900000000000000100
+WELCOME_ID = 900000000000000101
+LOGS_ID = 900000000000000102
+TICKETS_CATEGORY_ID = 900000000000000103
+VOICE_IDS = [900000000000000110 + i for i in range(3)]
+FIRST_MEMBER_ID = 910000000000000000
+EVERYONE_PERMISSIONS = str(discord.Permissions.general().value | discord.Permissions.text().value | discord.Permissions.voice().value)
+
+_next_id = discord.utils.time_snowflake(discord.utils.utcnow())
+
+def snowflake():
+    global _next_id
+    _next_id += 1
+    return str(_next_id)
+
+def now_iso():
+    return discord.utils.utcnow().isoformat()
+
+# --- Gateway payloads ---
+
+def user_payload(user_id, bot=False):
+    return {'id': str(user_id), 'username': f'user{user_id % 100000}', 'discriminator': '0', 'global_name': None, 'avatar': None, 'bot': bot}
+
+def member_payload(user_id, roles=(), bot=False):
+    return {
+        'user': user_payload(user_id, bot), 'roles': [str(r) for r in roles], 'joined_at': now_iso(),
+        'deaf': False, 'mute': False, 'flags': 0, 'communication_disabled_until': None
+    }
+
+def channel_payload(channel_id, name, type=0, parent_id=None, topic=None, overwrites=()):
+    return {
+        'id': str(channel_id), 'type': type, 'guild_id': str(GUILD_ID), 'name': name, 'position': 0,
+        'permission_overwrites': list(overwrites), 'parent_id': str(parent_id) if parent_id else None,
+        'topic': topic, 'nsfw': False, 'rate_limit_per_user': 0, 'bitrate': 64000, 'user_limit': 0
+    }
+
+def guild_payload(members):
+    roles = [
+        {'id': str(GUILD_ID), 'name': '@everyone', 'permissions': EVERYONE_PERMISSIONS, 'position': 0, 'color': 0, 'hoist': False, 'managed': False, 'mentionable': False},
+        {'id': str(STAFF_ROLE_ID), 'name': 'Staff', 'permissions': str(discord.Permissions(manage_messages=True, moderate_members=True).value), 'position': 1, 'color': 0, 'hoist': False, 'managed': False, 'mentionable': False},
+        {'id': str(BOT_ROLE_ID), 'name': 'Bot', 'permissions': str(discord.Permissions.all().value), 'position': 2, 'color': 0, 'hoist': False, 'managed': True, 'mentionable': False},
+    ]
+    channels = [
+        channel_payload(GENERAL_ID, 'general'),
+        channel_payload(WELCOME_ID, 'welcome'),
+        channel_payload(LOGS_ID, 'logs'),
+        channel_payload(TICKETS_CATEGORY_ID, 'Tickets', type=4),
+    ] + [channel_payload(vid, f'Voice {i}', type=2) for i, vid in enumerate(VOICE_IDS)]
+    member_list = [member_payload(BOT_ID, [BOT_ROLE_ID], bot=True)]
+    member_list += [member_payload(uid, [STAFF_ROLE_ID] if i % 50 == 0 else []) for i, uid in enumerate(members)]
+    return {
+        'id': str(GUILD_ID), 'name': 'Benchmark Guild', 'owner_id': str(FIRST_MEMBER_ID), 'roles': roles,
+        'channels': channels, 'members': member_list, 'member_count': len(member_list), 'emojis': [], 'stickers': [],
+        'features': [], 'voice_states': [], 'threads': [], 'presences': [], 'large': False, 'unavailable': False,
+        'verification_level': 0, 'default_message_notifications': 0, 'explicit_content_filter': 0,
+        'mfa_level': 0, 'premium_tier': 0, 'preferred_locale': 'en-US', 'nsfw_level': 0
+    }
+
+def message_payload(author_id, content, channel_id=GENERAL_ID, message_id=None, bot=False):
+    return {
+        'id': message_id or snowflake(), 'channel_id': str(channel_id), 'guild_id': str(GUILD_ID),
+        'author': user_payload(author_id, bot), 'member': {'roles': [], 'joined_at': now_iso(), 'deaf': False, 'mute': False, 'flags': 0},
+        'content': content, 'timestamp': now_iso(), 'edited_timestamp': None, 'tts': False, 'mention_everyone': False,
+        'mentions': [], 'mention_roles': [], 'attachments': [], 'embeds': [], 'pinned': False, 'type': 0, 'flags': 0, 'components': []
+    }
+
+def voice_payload(user_id, channel_id):
+    return {
+        'guild_id': str(GUILD_ID), 'channel_id': str(channel_id) if channel_id else None, 'user_id': str(user_id),
+        'member': member_payload(user_id), 'session_id': 'bench', 'deaf': False, 'mute': False, 'self_deaf': False,
+        'self_mute': random.random() < 0.3, 'self_video': False, 'self_stream': False, 'suppress': False, 'request_to_speak_timestamp': None
+    }
+
+def ticket_interaction_payload(user_id, ticket_type, panel_message_id):
+    return {
+        'id': snowflake(), 'application_id': str(BOT_ID), 'type': 3, 'token': f'token-{user_id}', 'version': 1,
+        'guild_id': str(GUILD_ID), 'channel_id': str(GENERAL_ID), 'channel': channel_payload(GENERAL_ID, 'general'),
+        'member': dict(member_payload(user_id), permissions=EVERYONE_PERMISSIONS),
+        'app_permissions': str(discord.Permissions.all().value), 'locale': 'en-US', 'guild_locale': 'en-US', 'entitlements': [],
+        'authorizing_integration_owners': {}, 'attachment_size_limit': 8388608,
+        'data': {'custom_id': 'ticket_type_select_main', 'component_type': 3, 'values': [ticket_type]},
+        'message': message_payload(BOT_ID, '', message_id=panel_message_id, bot=True)
+    }
+
+# --- Scenarios: (أحداث تحضيرية لا تُقاس، الأحداث المقاسة) ---
+
+WORDS = ['hello', 'مرحبا', 'gg', 'lol', 'السلام عليكم', 'ok', 'test', 'كيف الحال', 'nice', 'thanks']
+
+def random_text():
+    text = ' '.join(random.choices(WORDS, k=random.randint(1, 12)))
+    roll = random.random()
+    if roll < 0.05:
+        text += ' https://example.com/some/page'
+    elif roll < 0.07:
+        text += ' discord.gg/invite'
+    return text
+
+def message_flood(members, count):
+    events = []
+    spammers = members[:max(1, len(members) // 100)]
+    for _ in range(count):
+        if random.random() < 0.1:
+            # سبام: نفس الرسالة من نفس العضو بسرعة
+            events.append(('MESSAGE_CREATE', message_payload(random.choice(spammers), 'free nitro!!!')))
+        else:
+            events.append(('MESSAGE_CREATE', message_payload(random.choice(members), random_text())))
+    return [], events
+
+def edit_delete_storm(members, count):
+    created = [message_payload(random.choice(members), random_text()) for _ in range(min(count, 1000))]
+    setup = [('MESSAGE_CREATE', payload) for payload in created]
+    events = []
+    for _ in range(count):
+        target = random.choice(created)
+        if random.random() < 0.6:
+            events.append(('MESSAGE_UPDATE', dict(target, content=random_text(), edited_timestamp=now_iso())))
+        else:
+            events.append(('MESSAGE_DELETE', {'id': target['id'], 'channel_id': target['channel_id'], 'guild_id': str(GUILD_ID)}))
+    return setup, events
+
+def join_wave(members, count):
+    start = FIRST_MEMBER_ID + len(members) + 1
+    return [], [('GUILD_MEMBER_ADD', dict(member_payload(start + i), guild_id=str(GUILD_ID))) for i in range(count)]
+
+def voice_churn(members, count):
+    events = []
+    in_voice = {}
+    for _ in range(count):
+        user_id = random.choice(members)
+        current = in_voice.get(user_id)
+        if current and random.random() < 0.4:
+            channel_id = None
+        else:
+            channel_id = random.choice(VOICE_IDS)
+        in_voice[user_id] = channel_id
+        events.append(('VOICE_STATE_UPDATE', voice_payload(user_id, channel_id)))
+    return [], events
+
+def ticket_opens(members, count):
+    panel_message_id = snowflake()
+    types = ['inquiry', 'complaint', 'girl_verification', 'staff_app']
+    openers = random.sample(members, min(count, len(members)))
+    events = []
+    for i in range(count):
+        # بعض الأعضاء يضغطون مرتين (تذكرة مفتوحة بالفعل)
+        user_id = openers[i % len(openers)] if random.random() > 0.1 else openers[0]
+        events.append(('INTERACTION_CREATE', ticket_interaction_payload(user_id, random.choice(types), panel_message_id)))
+    return [], events
+
+def load_recorded(path):
+    events = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            data = record['d']
+            # الأحداث المسجلة تُوجه للسيرفر الوهمي
+            if 'guild_id' in data:
+                data['guild_id'] = str(GUILD_ID)
+            events.append((record['t'], data))
+    return [], events
+
+# --- Stub HTTP ---
+
+class FakeAPI:
+    # يرد على طلبات REST بنفس شكل ردود ديسكورد، ويعد الطلبات حسب المسار
+    def __init__(self, bot, latency=0.0):
+        self.bot = bot
+        self.latency = latency
+        self.calls = Counter()
+
+    async def request(self, route, *, files=None, form=None, **kwargs):
+        return await self.respond(route, kwargs.get('json'), form)
+
+    async def respond(self, route, payload=None, form=None):
+        self.calls[f'{route.method} {route.path}'] += 1
+        if form:
+            for field in form:
+                if field.get('name') == 'payload_json':
+                    payload = json.loads(field['value'])
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        handler = getattr(self, ROUTES.get((route.method, route.path), ''), None)
+        return handler(route, payload or {}) if handler else None
+
+    def send_message(self, route, payload):
+        data = message_payload(BOT_ID, payload.get('content') or '', channel_id=route.channel_id, bot=True)
+        data['embeds'] = payload.get('embeds', [])
+        return data
+
+    def webhook_message(self, route, payload):
+        data = message_payload(BOT_ID, payload.get('content') or '', bot=True)
+        data['webhook_id'] = str(route.webhook_id)
+        return data
+
+    def interaction_callback(self, route, payload):
+        return {'interaction': {'id': str(route.webhook_id), 'type': 3}}
+
+    def create_channel(self, route, payload):
+        data = channel_payload(
+            snowflake(), payload.get('name', 'channel'), type=payload.get('type', 0), parent_id=payload.get('parent_id'),
+            topic=payload.get('topic'), overwrites=payload.get('permission_overwrites', [])
+        )
+        # ديسكورد يرسل CHANNEL_CREATE عبر الـ gateway بعد الطلب
+        self.bot._connection.parse_channel_create(data)
+        return data
+
+    def edit_member(self, route, payload):
+        user_id = int(route.url.rsplit('/', 1)[-1])
+        data = member_payload(user_id)
+        data['communication_disabled_until'] = payload.get('communication_disabled_until')
+        return data
+
+    def audit_logs(self, route, payload):
+        return {
+            'audit_log_entries': [], 'users': [], 'webhooks': [], 'threads': [], 'integrations': [],
+            'application_commands': [], 'auto_moderation_rules': [], 'guild_scheduled_events': []
+        }
+
+    def channel_history(self, route, payload):
+        return []
+
+ROUTES = {
+    ('POST', '/channels/{channel_id}/messages'): 'send_message',
+    ('POST', '/webhooks/{webhook_id}/{webhook_token}'): 'webhook_message',
+    ('PATCH', '/webhooks/{webhook_id}/{webhook_token}/messages/{message_id}'): 'webhook_message',
+    ('POST', '/interactions/{webhook_id}/{webhook_token}/callback'): 'interaction_callback',
+    ('POST', '/guilds/{guild_id}/channels'): 'create_channel',
+    ('PATCH', '/guilds/{guild_id}/members/{user_id}'): 'edit_member',
+    ('GET', '/guilds/{guild_id}/audit-logs'): 'audit_logs',
+    ('GET', '/channels/{channel_id}/messages'): 'channel_history',
+}
+
+class FakeWebhookAdapter(webhook_async.AsyncWebhookAdapter):
+    # ردود التفاعلات والـ followups لا تمر عبر bot.http بل عبر هذا الـ adapter
+    def __init__(self, api):
+        super().__init__()
+        self.api = api
+
+    async def request(self, route, session=None, *, payload=None, multipart=None, files=None, **kwargs):
+        return await self.api.respond(route, payload, multipart)
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self, data):
+        self._data = data
+
+    async def read(self):
+        return self._data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeSession:
+    # بديل bot.http_session: كل الصور الشخصية صورة واحدة مولدة محلياً
+    def __init__(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (128, 128), (88, 101, 242)).save(buffer, 'PNG')
+        self.avatar = buffer.getvalue()
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        return FakeResponse(self.avatar)
+
+    async def close(self):
+        pass
+
+# --- Runner ---
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def drain(bot):
+    # انتظار كل ما بدأته الأحداث: listeners، أزرار وقوائم، وطوابير اللوقات
+    while True:
+        pending = [t for t in asyncio.all_tasks() if not t.done() and t.get_name().startswith(DRAIN_PREFIXES)]
+        logging_cog = bot.get_cog('Logging')
+        if logging_cog:
+            pending += [t for t in logging_cog._log_tasks.values() if not t.done()]
+        if not pending:
+            return
+        await asyncio.wait(pending)
+
+def feed(state, event, data):
+    parser = getattr(state, f'parse_{event.lower()}', None)
+    if parser is None:
+        raise ValueError(f'Unknown gateway event: {event}')
+    parser(data)
+
+def instrument_views():
+    # أزرار وقوائم الـ views لا تمر عبر listeners، فنقيسها هنا
+    original = discord.ui.View._scheduled_task
+
+    async def timed(self, item, interaction):
+        with metrics.metrics.timer('component', f'{type(self).__name__}.{type(item).__name__}'):
+            return await original(self, item, interaction)
+
+    discord.ui.View._scheduled_task = timed
+
+async def build_bot(args, members):
+    from bot import MyBot
+    bot = MyBot()
+    await bot._async_setup_hook()
+
+    api = FakeAPI(bot, latency=args.api_latency / 1000)
+    bot.http.request = api.request
+    webhook_async.async_context.set(FakeWebhookAdapter(api))
+    bot.http_session = FakeSession()
+
+    state = bot._connection
+    state.user = discord.ClientUser(state=state, data=user_payload(BOT_ID, bot=True))
+    state.application_id = BOT_ID
+
+    await database.init_db()
+    skip = set(args.skip_cogs.split(',')) if args.skip_cogs else set()
+    for filename in sorted(os.listdir('./cogs')):
+        if filename.endswith('.py') and filename[:-3] not in skip:
+            await bot.load_extension(f'cogs.{filename[:-3]}')
+    await metrics.metrics.start(bot)
+    instrument_views()
+
+    state._add_guild_from_data(guild_payload(members))
+    await database.set_ticket_settings(GUILD_ID, TICKETS_CATEGORY_ID, LOGS_ID, STAFF_ROLE_ID, STAFF_ROLE_ID)
+
+    # on_ready للإضافات فقط (on_ready الخاص بالبوت يحتاج اتصال gateway)
+    for cog in bot.cogs.values():
+        for name, listener in cog.get_listeners():
+            if name == 'on_ready':
+                await listener()
+    return bot, api
+
+def reset_counters(api):
+    metrics.metrics.histograms.clear()
+    metrics.metrics.errors.clear()
+    metrics.metrics.loop_lag = metrics.Histogram()
+    database.query_profiler.reset()
+    api.calls.clear()
+
+def summarize(name, events, elapsed, api):
+    handlers = []
+    for (kind, handler), histogram in metrics.metrics.histograms.items():
+        handlers.append({
+            'handler': f'{kind}:{handler}', 'count': histogram.count,
+            'p50_ms': round(histogram.percentile(50) * 1000, 3), 'p99_ms': round(histogram.percentile(99) * 1000, 3),
+            'max_ms': round(histogram.max * 1000, 3), 'errors': metrics.metrics.errors.get((kind, handler), 0)
+        })
+    handlers.sort(key=lambda item: item['p99_ms'], reverse=True)
+    queries = sum(stats.latency.count for stats in database.query_profiler.stats.values())
+    db_seconds = sum(stats.latency.total for stats in database.query_profiler.stats.values())
+    top_queries = [
+        {'query': query[:120], 'count': stats.latency.count, 'p99_ms': round(stats.latency.percentile(99) * 1000, 3)}
+        for query, stats in database.query_profiler.top(5)
+    ]
+    return {
+        'scenario': name,
+        'backend': 'postgres' if database.db_manager.is_pg else 'sqlite',
+        'events': events,
+        'seconds': round(elapsed, 3),
+        'events_per_sec': round(events / elapsed, 1) if elapsed else 0,
+        'handler_p99_ms': max((item['p99_ms'] for item in handlers), default=0),
+        'handlers': handlers,
+        'db_queries': queries,
+        'db_queries_per_event': round(queries / events, 3) if events else 0,
+        'db_seconds': round(db_seconds, 3),
+        'top_queries': top_queries,
+        'http_calls_per_event': round(sum(api.calls.values()) / events, 3) if events else 0,
+        'http_calls': dict(api.calls.most_common(8)),
+        'loop_lag_p99_ms': round(metrics.metrics.loop_lag.percentile(99) * 1000, 3),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+def print_result(result):
+    print(f"\n== {result['scenario']} ({result['backend']}) ==")
+    print(f"  events: {result['events']} in {result['seconds']}s -> {result['events_per_sec']} events/s")
+    print(f"  handler p99: {result['handler_p99_ms']}ms | loop lag p99: {result['loop_lag_p99_ms']}ms | peak RSS: {result['peak_rss_mb']}MB")
+    print(f"  db: {result['db_queries']} queries ({result['db_queries_per_event']}/event, {result['db_seconds']}s) | http: {result['http_calls_per_event']}/event")
+    for item in result['handlers'][:8]:
+        errors = f" errors={item['errors']}" if item['errors'] else ""
+        print(f"    {item['handler']:<55} n={item['count']:<6} p50={item['p50_ms']}ms p99={item['p99_ms']}ms{errors}")
+    for item in result['top_queries']:
+        print(f"    [{item['count']}x p99={item['p99_ms']}ms] {item['query']}")
+
+async def run(args):
+    random.seed(args.seed)
+    if 'SLOW_QUERY_MS' not in os.environ:
+        # تحت الضغط كل استعلام تقريباً "بطيء"، والأرقام في الملخص أوضح من آلاف الأسطر
+        database.SLOW_QUERY_MS = float('inf')
+    tmpdir = None
+    if args.postgres:
+        database.DATABASE_URL = args.postgres
+        database.db_manager.is_pg = True
+    else:
+        # حتى لو كان DATABASE_URL في .env، الـ benchmark لا يلمس قاعدة بيانات حقيقية
+        tmpdir = tempfile.mkdtemp(prefix='thex-bench-')
+        database.DATABASE_URL = None
+        database.db_manager.is_pg = False
+        database.DB_PATH = os.path.join(tmpdir, 'bench.db')
+
+    members = [FIRST_MEMBER_ID + i for i in range(args.members)]
+    bot, api = await build_bot(args, members)
+    state = bot._connection
+    results = []
+    try:
+        if args.replay:
+            plans = [(os.path.basename(args.replay), load_recorded(args.replay))]
+        else:
+            names = SCENARIOS if args.scenario == 'all' else args.scenario.split(',')
+            plans = [(name, globals()[name](members, args.events)) for name in names]
+
+        for name, (setup, events) in plans:
+            for event, data in setup:
+                feed(state, event, data)
+            await drain(bot)
+            reset_counters(api)
+
+            start = time.perf_counter()
+            for i, (event, data) in enumerate(events, 1):
+                feed(state, event, data)
+                # إعطاء الـ loop فرصة كما يحدث مع gateway حقيقي بدل تكديس كل المهام دفعة واحدة
+                if i % args.batch == 0:
+                    await asyncio.sleep(0)
+            await drain(bot)
+            result = summarize(name, len(events), time.perf_counter() - start, api)
+            results.append(result)
+            print_result(result)
+    finally:
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task() and task.get_name().startswith(DRAIN_PREFIXES):
+                task.cancel()
+        await bot.close()
+        if tmpdir:
+            for filename in os.listdir(tmpdir):
+                os.remove(os.path.join(tmpdir, filename))
+            os.rmdir(tmpdir)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nResults written to {args.json}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay gateway events through MyBot without network access.')
+    parser.add_argument('-s', '--scenario', default='all', help=f"all or comma separated: {', '.join(SCENARIOS)}")
+    parser.add_argument('-n', '--events', type=int, default=2000, help='events per scenario')
+    parser.add_argument('--members', type=int, default=1000, help='members in the synthetic guild')
+    parser.add_argument('--replay', help='JSONL file of recorded gateway dispatches ({"t": ..., "d": ...})')
+    parser.add_argument('--postgres', help='DSN of a throwaway PostgreSQL database (default: temp SQLite file)')
+    parser.add_argument('--api-latency', type=float, default=0.0, help='simulated Discord REST latency in ms')
+    parser.add_argument('--skip-cogs', default='', help='comma separated cogs not to load (e.g. welcome)')
+    parser.add_argument('--batch', type=int, default=50, help='events fed between loop yields')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='write results to this file')
+    # مثل bot.run: أخطاء الـ listeners تُطبع بدل أن تختفي
+    discord.utils.setup_logging(level=logging.WARNING)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
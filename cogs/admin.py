@@ -1,76 +1,265 @@
-import discord
-from discord.ext import commands
-from discord import app_commands
-import asyncio
-import datetime
-
-class Admin(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
-
-    @app_commands.command(name="broadcast", description="إرسال رسالة برودكاست لكل أعضاء السيرفر في الخاص")
-    @app_commands.describe(message="الرسالة التي تريد إرسالها")
-    @app_commands.checks.has_permissions(administrator=True)
-    async def broadcast(self, interaction: discord.Interaction, message: str):
-        await interaction.response.send_message("🚀 جارٍ البدء في إرسال البرودكاست... قد يستغرق هذا وقتاً طويلاً حسب عدد الأعضاء.", ephemeral=True)
-        
-        guild = interaction.guild
-        members = guild.members
-        success = 0
-        failed = 0
-        
-        for member in members:
-            if member.bot:
-                continue
-            
-            try:
-                embed = discord.Embed(
-                    title=f"رسالة من سيرفر {guild.name}",
-                    description=message,
-                    color=discord.Color.blue(),
-                    timestamp=datetime.datetime.now() if 'datetime' in globals() else None
-                )
-                embed.set_footer(text=f"Sent by {interaction.user.display_name}")
-                await member.send(embed=embed)
-                success += 1
-                await asyncio.sleep(1) # تأخير لتجنب الـ Rate Limit
-            except:
-                failed += 1
-                
-        await interaction.followup.send(f"✅ انتهى البرودكاست!\n**تم الإرسال بنجاح:** {success}\n**فشل الإرسال (الخاص مغلق):** {failed}", ephemeral=True)
-
-    @app_commands.command(name="add-alias", description="إضافة اختصار لأمر معين")
-    @app_commands.describe(command_name="اسم الأمر الأصلي", alias="الاختصار الجديد")
-    @app_commands.checks.has_permissions(administrator=True)
-    async def add_alias(self, interaction: discord.Interaction, command_name: str, alias: str):
-        import database
-        # التأكد من وجود الأمر
-        cmd = self.bot.get_command(command_name)
-        if not cmd:
-            return await interaction.response.send_message(f"❌ الأمر `{command_name}` غير موجود.", ephemeral=True)
-            
-        await database.add_alias(interaction.guild.id, alias, command_name)
-        await interaction.response.send_message(f"✅ تم إضافة الاختصار `{alias}` للأمر `{command_name}`.")
-
-    @app_commands.command(name="remove-alias", description="إزالة اختصار لأمر")
-    @app_commands.describe(alias="الاختصار المراد حذفه")
-    @app_commands.checks.has_permissions(administrator=True)
-    async def remove_alias(self, interaction: discord.Interaction, alias: str):
-        import database
-        await database.remove_alias(interaction.guild.id, alias)
-        await interaction.response.send_message(f"✅ تم إزالة الاختصار `{alias}`.")
-
-    @app_commands.command(name="sync", description="تحديث قوائم الأوامر في السيرفر")
-    @app_commands.checks.has_permissions(administrator=True)
-    async def sync(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True)
-        try:
-            # هذه الحركة تجبر ديسكورد على تحديث القوائم في السيرفر الحالي فوراً
-            self.bot.tree.copy_global_to(guild=interaction.guild)
-            await self.bot.tree.sync(guild=interaction.guild)
-            await interaction.followup.send("✅ تم تحديث قائمة الأوامر والخيارات بنجاح! جرب استخدام `/set-log` الآن.")
-        except Exception as e:
-            await interaction.followup.send(f"❌ فشل التحديث: {e}")
-
-async def setup(bot):
-    await bot.add_cog(Admin(bot))
+import discord
+from discord.ext import commands
+from discord import app_commands
+import asyncio
+import datetime
+import os
+import time
+import database
+import metrics
+
+# عدد الرسائل الخاصة المرسلة بالتوازي، وتأخير الـ Rate Limit تتحكم فيه مكتبة discord.py حسب الـ headers
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', 5))
+BROADCAST_PROGRESS_INTERVAL = 10 # ثواني بين كل تحديث لرسالة التقدم
+BROADCAST_RETRIES = 3 # إعادة المحاولة للأخطاء المؤقتة قبل إيقاف البرودكاست
+BROADCAST_RETRY_DELAY = 5 # ثواني، تتضاعف مع كل محاولة
+METRICS_TOP = 10 # عدد أبطأ الأحداث/الأوامر المعروضة في /metrics
+
+class BroadcastJob:
+    def __init__(self, bot, job):
+        self.bot = bot
+        self.job = job
+        self.success = job['success']
+        self.failed = job['failed']
+        self.last_user_id = job['last_user_id']
+        self.total = 0
+        self.started_at = time.monotonic()
+        self.sent_this_run = 0
+        self._last_report = 0
+
+    def build_embed(self, guild):
+        embed = discord.Embed(
+            title=f"رسالة من سيرفر {guild.name}",
+            description=self.job['message'],
+            color=discord.Color.blue(),
+            timestamp=datetime.datetime.fromisoformat(self.job['created_at'])
+        )
+        embed.set_footer(text=f"Sent by {self.job['author_name']}")
+        return embed
+
+    async def _send(self, member, embed):
+        # True: وصلت، False: فشل نهائي (الخاص مغلق أو الحساب غير موجود)
+        # أي خطأ آخر مؤقت (شبكة، جلسة مغلقة...) يُرفع حتى لا يُحسب العضو ضمن من تم إرسالهم
+        try:
+            await member.send(embed=embed)
+            return True
+        except (discord.Forbidden, discord.NotFound):
+            return False
+
+    async def _send_chunk(self, chunk, embed):
+        results = {}
+        pending = chunk
+        for attempt in range(BROADCAST_RETRIES + 1):
+            outcomes = await asyncio.gather(*(self._send(m, embed) for m in pending), return_exceptions=True)
+            retry = []
+            for member, outcome in zip(pending, outcomes):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                if isinstance(outcome, BaseException):
+                    retry.append((member, outcome))
+                else:
+                    results[member.id] = outcome
+            if not retry:
+                return list(results.values())
+            if attempt == BROADCAST_RETRIES:
+                # نقطة الاستكمال لا تتقدم: الدفعة كاملة تُعاد عند استكمال البرودكاست
+                raise retry[0][1]
+            pending = [member for member, error in retry]
+            await asyncio.sleep(BROADCAST_RETRY_DELAY * 2 ** attempt)
+
+    async def run(self):
+        try:
+            await self._run()
+        except Exception as e:
+            # بدون هذا تبقى المهمة 'running' في قاعدة البيانات بدون أي أثر حتى إعادة التشغيل
+            print(f"Broadcast #{self.job['job_id']} failed: {e}")
+            try:
+                await database.finish_broadcast_job(self.job['job_id'], 'failed')
+                await self.report(failed=True)
+            except Exception as e:
+                print(f"Broadcast #{self.job['job_id']} could not be marked as failed: {e}")
+
+    async def _run(self):
+        guild = self.bot.get_guild(self.job['guild_id'])
+        if guild is None:
+            await database.finish_broadcast_job(self.job['job_id'], 'failed')
+            return
+
+        # الـ embed يُبنى مرة واحدة لكل الأعضاء
+        embed = self.build_embed(guild)
+        # الترتيب حسب الـ ID يسمح بالاستكمال من آخر عضو بعد إعادة التشغيل
+        members = sorted((m for m in guild.members if not m.bot), key=lambda m: m.id)
+        self.total = len(members)
+        remaining = [m for m in members if m.id > self.last_user_id]
+
+        for i in range(0, len(remaining), BROADCAST_CONCURRENCY):
+            chunk = remaining[i:i + BROADCAST_CONCURRENCY]
+            results = await self._send_chunk(chunk, embed)
+            sent = sum(results)
+            self.success += sent
+            self.failed += len(results) - sent
+            self.sent_this_run += len(results)
+            self.last_user_id = chunk[-1].id
+            await database.update_broadcast_progress(self.job['job_id'], self.last_user_id, self.success, self.failed)
+
+            if time.monotonic() - self._last_report >= BROADCAST_PROGRESS_INTERVAL:
+                await self.report()
+
+        await database.finish_broadcast_job(self.job['job_id'])
+        await self.report(done=True)
+
+    async def report(self, done=False, failed=False):
+        self._last_report = time.monotonic()
+        channel = self.bot.get_channel(self.job['channel_id'])
+        if channel is None:
+            return
+
+        elapsed = time.monotonic() - self.started_at
+        rate = self.sent_this_run / elapsed if elapsed > 0 else 0
+        processed = self.success + self.failed
+        if failed:
+            embed = discord.Embed(title="❌ توقف البرودكاست بسبب خطأ", color=discord.Color.red())
+        else:
+            embed = discord.Embed(
+                title="✅ انتهى البرودكاست!" if done else "🚀 جارٍ إرسال البرودكاست...",
+                color=discord.Color.green() if done else discord.Color.blue()
+            )
+        embed.add_field(name="التقدم", value=f"{processed} / {self.total}", inline=True)
+        embed.add_field(name="تم الإرسال بنجاح", value=self.success, inline=True)
+        embed.add_field(name="فشل الإرسال (الخاص مغلق)", value=self.failed, inline=True)
+        embed.add_field(name="السرعة", value=f"{rate:.1f} رسالة/ثانية", inline=True)
+        if not done and not failed and rate > 0:
+            eta = int((self.total - processed) / rate)
+            embed.add_field(name="الوقت المتبقي", value=str(datetime.timedelta(seconds=eta)), inline=True)
+        embed.set_footer(text=f"Broadcast #{self.job['job_id']}")
+
+        try:
+            await channel.get_partial_message(self.job['progress_message_id']).edit(content=None, embed=embed)
+        except discord.HTTPException:
+            pass
+
+class Admin(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self._broadcasts = {} # guild_id -> asyncio.Task
+
+    async def cog_unload(self):
+        # إيقاف البرودكاست قبل إغلاق جلسة HTTP، وإلا يُحسب كل الباقين فشلاً وتتقدم نقطة الاستكمال
+        # (المهمة تبقى 'running' في قاعدة البيانات وتُستكمل من آخر دفعة محفوظة)
+        tasks = [task for task in self._broadcasts.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _start_broadcast(self, job):
+        task = asyncio.create_task(BroadcastJob(self.bot, job).run())
+        self._broadcasts[job['guild_id']] = task
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # استكمال البرودكاست الذي توقف بسبب إعادة التشغيل
+        for job in await database.get_running_broadcasts():
+            task = self._broadcasts.get(job['guild_id'])
+            if task is None or task.done():
+                self._start_broadcast(job)
+
+    @app_commands.command(name="broadcast", description="إرسال رسالة برودكاست لكل أعضاء السيرفر في الخاص")
+    @app_commands.describe(message="الرسالة التي تريد إرسالها")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def broadcast(self, interaction: discord.Interaction, message: str):
+        task = self._broadcasts.get(interaction.guild.id)
+        if task and not task.done():
+            return await interaction.response.send_message("❌ يوجد برودكاست قيد الإرسال في هذا السيرفر بالفعل.", ephemeral=True)
+        # حجز السيرفر فوراً قبل أي await، وإلا يمر أمران متتاليان من نفس الفحص ويُرسل البرودكاست مرتين
+        # (مهمة هذا الأمر نفسه: إذا فشل قبل بدء البرودكاست تنتهي فيتحرر الحجز تلقائياً)
+        self._broadcasts[interaction.guild.id] = asyncio.current_task()
+
+        await interaction.response.send_message("🚀 جارٍ البدء في إرسال البرودكاست... سيتم تحديث التقدم في رسالة بهذه القناة.", ephemeral=True)
+
+        # رسالة عادية في القناة (وليست رد التفاعل) حتى يمكن تحديثها بعد انتهاء صلاحية التفاعل
+        progress = await interaction.channel.send("🚀 جارٍ البدء في إرسال البرودكاست...")
+        job = await database.create_broadcast_job(interaction.guild.id, interaction.channel.id, progress.id, interaction.user.display_name, message)
+        self._start_broadcast(job)
+
+    @app_commands.command(name="add-alias", description="إضافة اختصار لأمر معين")
+    @app_commands.describe(command_name="اسم الأمر الأصلي", alias="الاختصار الجديد")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def add_alias(self, interaction: discord.Interaction, command_name: str, alias: str):
+        # التأكد من وجود الأمر
+        cmd = self.bot.get_command(command_name)
+        if not cmd:
+            return await interaction.response.send_message(f"❌ الأمر `{command_name}` غير موجود.", ephemeral=True)
+
+        await database.add_alias(interaction.guild.id, alias, command_name)
+        await interaction.response.send_message(f"✅ تم إضافة الاختصار `{alias}` للأمر `{command_name}`.")
+
+    @app_commands.command(name="remove-alias", description="إزالة اختصار لأمر")
+    @app_commands.describe(alias="الاختصار المراد حذفه")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def remove_alias(self, interaction: discord.Interaction, alias: str):
+        await database.remove_alias(interaction.guild.id, alias)
+        await interaction.response.send_message(f"✅ تم إزالة الاختصار `{alias}`.")
+
+    @app_commands.command(name="metrics", description="عرض أداء البوت (أبطأ الأحداث والأوامر، الأخطاء، تأخر الـ loop)")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def show_metrics(self, interaction: discord.Interaction):
+        registry = metrics.metrics
+        ms = lambda seconds: f"{seconds * 1000:.1f}ms"
+
+        embed = discord.Embed(title="📊 أداء البوت", color=discord.Color.blue(), timestamp=discord.utils.utcnow())
+        slowest = sorted(registry.histograms.items(), key=lambda item: item[1].percentile(99), reverse=True)[:METRICS_TOP]
+        lines = []
+        for (kind, name), histogram in slowest:
+            errors = registry.errors.get((kind, name), 0)
+            line = f"`{name}` p50 {ms(histogram.percentile(50))} | p99 {ms(histogram.percentile(99))} | {histogram.count}x"
+            lines.append(line + (f" | ❌ {errors}" if errors else ""))
+        embed.add_field(name="أبطأ الأحداث والأوامر (p99)", value="\n".join(lines)[:1024] or "لا يوجد بيانات بعد", inline=False)
+
+        errors = sorted(registry.errors.items(), key=lambda item: item[1], reverse=True)[:METRICS_TOP]
+        embed.add_field(name="الأخطاء", value="\n".join(f"`{name}`: {count}" for (kind, name), count in errors)[:1024] or "لا يوجد", inline=False)
+
+        lag = registry.loop_lag
+        embed.add_field(name="تأخر الـ Event Loop", value=f"p50 {ms(lag.percentile(50))} | p99 {ms(lag.percentile(99))} | max {ms(lag.max)}", inline=False)
+
+        gauges = registry.gauges(self.bot)
+        embed.add_field(name="أخرى", value="\n".join(f"`{name}`: {value:.2f}" if isinstance(value, float) else f"`{name}`: {value}" for name, value in gauges.items())[:1024], inline=False)
+        if metrics.METRICS_SAMPLE_RATE < 1:
+            embed.set_footer(text=f"Sample rate: {metrics.METRICS_SAMPLE_RATE:.0%}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="db-stats", description="عرض أكثر استعلامات قاعدة البيانات استهلاكاً للوقت")
+    @app_commands.describe(reset="تصفير الإحصائيات بعد العرض")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def db_stats(self, interaction: discord.Interaction, reset: bool = False):
+        profiler = database.query_profiler
+        embed = discord.Embed(title="🗄️ إحصائيات قاعدة البيانات", color=discord.Color.blue(), timestamp=discord.utils.utcnow())
+        for query, stats in profiler.top(limit=METRICS_TOP):
+            latency = stats.latency
+            value = (
+                f"{latency.count}x | total {latency.total * 1000:.0f}ms | "
+                f"p50 {latency.percentile(50) * 1000:.1f}ms | p99 {latency.percentile(99) * 1000:.1f}ms | "
+                f"wait p99 {stats.wait.percentile(99) * 1000:.1f}ms | rows {stats.rows}" + (f" | ❌ {stats.errors}" if stats.errors else "")
+            )
+            embed.add_field(name=query[:250], value=value, inline=False)
+        if not profiler.stats:
+            embed.description = "لا يوجد بيانات بعد (أو أن DB_PROFILING معطل)."
+        embed.set_footer(text=f"Slow queries (>{database.SLOW_QUERY_MS:.0f}ms): {profiler.slow_queries}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        if reset:
+            profiler.reset()
+
+    @app_commands.command(name="sync", description="تحديث قوائم الأوامر في السيرفر")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def sync(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            # هذه الحركة تجبر ديسكورد على تحديث القوائم في السيرفر الحالي فوراً
+            self.bot.tree.copy_global_to(guild=interaction.guild)
+            await self.bot.tree.sync(guild=interaction.guild)
+            await interaction.followup.send("✅ تم تحديث قائمة الأوامر والخيارات بنجاح! جرب استخدام `/set-log` الآن.")
+        except Exception as e:
+            await interaction.followup.send(f"❌ فشل التحديث: {e}")
+
+async def setup(bot):
+    await bot.add_cog(Admin(bot))
@@ -1,147 +1,548 @@
-import discord
-from discord.ext import commands
-import datetime
-
-class Moderation(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
-
-    @commands.hybrid_command(name='kick', help='طرد عضو من السيرفر')
-    @commands.has_permissions(kick_members=True)
-    async def kick(self, ctx, member: discord.Member, *, reason: str = None):
-        await member.kick(reason=reason)
-        await ctx.send(f'✅ تم طرد {member.mention} للسبب: {reason}')
-
-    @commands.hybrid_command(name='ban', help='حظر عضو من السيرفر')
-    @commands.has_permissions(ban_members=True)
-    async def ban(self, ctx, member: discord.Member, *, reason: str = None):
-        await member.ban(reason=reason)
-        await ctx.send(f'⛔ تم حظر {member.mention} للسبب: {reason}')
-
-    @commands.hybrid_command(name='unban', help='إزالة الحظر عن عضو')
-    @commands.has_permissions(ban_members=True)
-    async def unban(self, ctx, *, member_id: str):
-        try:
-            user = await self.bot.fetch_user(int(member_id))
-            await ctx.guild.unban(user)
-            await ctx.send(f'✅ تم إزالة الحظر عن {user.mention}')
-        except Exception as e:
-            await ctx.send(f'❌ حدث خطأ: {e}')
-
-    @commands.hybrid_command(name='purge', aliases=['clear'], help='مسح عدد معين من الرسائل')
-    @commands.has_permissions(manage_messages=True)
-    async def purge(self, ctx, amount: int):
-        await ctx.channel.purge(limit=amount + 1)
-        # رسالة مؤقتة وتختفي
-        await ctx.send(f'🧹 تم مسح {amount} رسالة.', delete_after=5)
-
-    @commands.hybrid_command(name='mute', help='إسكات عضو (Timeout) لمدة معينة بالدقائق')
-    @commands.has_permissions(moderate_members=True)
-    async def mute(self, ctx, member: discord.Member, minutes: int, *, reason: str = "No reason"):
-        duration = datetime.timedelta(minutes=minutes)
-        await member.timeout(duration, reason=reason)
-        await ctx.send(f'🔇 تم إسكات {member.mention} لمدة {minutes} دقيقة. السبب: {reason}')
-
-    @commands.hybrid_command(name='unmute', help='إزالة الإسكات عن عضو')
-    @commands.has_permissions(moderate_members=True)
-    async def unmute(self, ctx, member: discord.Member):
-        await member.timeout(None)
-        await ctx.send(f'🔊 تم إزالة الإسكات عن {member.mention}')
-
-    @commands.hybrid_command(name='lock', help='قفل الروم لمنع الكتابة')
-    @commands.has_permissions(manage_channels=True)
-    async def lock(self, ctx):
-        await ctx.channel.set_permissions(ctx.guild.default_role, send_messages=False)
-        await ctx.send(f'🔒 تم قفل القناة {ctx.channel.mention}')
-
-    @commands.hybrid_command(name='unlock', help='فتح الروم للكتابة')
-    @commands.has_permissions(manage_channels=True)
-    async def unlock(self, ctx):
-        await ctx.channel.set_permissions(ctx.guild.default_role, send_messages=True)
-        await ctx.send(f'🔓 تم فتح القناة {ctx.channel.mention}')
-
-    @commands.hybrid_command(name='slowmode', help='تفعيل وضع البطء في القناة')
-    @commands.has_permissions(manage_channels=True)
-    async def slowmode(self, ctx, seconds: int):
-        await ctx.channel.edit(slowmode_delay=seconds)
-        await ctx.send(f'⏳ تم ضبط وضع البطء إلى {seconds} ثانية.')
-
-    @commands.hybrid_command(name='nick', help='تغيير لقب عضو')
-    @commands.has_permissions(manage_nicknames=True)
-    async def nick(self, ctx, member: discord.Member, *, nickname: str = None):
-        await member.edit(nick=nickname)
-        await ctx.send(f'✅ تم تغيير لقب {member.mention} إلى {nickname or "الافتراضي"}.')
-
-    # Basic Auto-Mod: Anti-link (Optional, can be disabled)
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot or message.author.guild_permissions.manage_messages:
-            return
-        
-        # Simple anti-link (covers common patterns)
-        links = ["http://", "https://", "discord.gg/"]
-        if any(link in message.content for link in links):
-            await message.delete()
-            await message.channel.send(f"⚠️ {message.author.mention}, يمنع إرسال الروابط في هذا السيرفر!", delete_after=5)
-
-    # Error Handling for permissions
-    @kick.error
-    @ban.error
-    @purge.error
-    @mute.error
-    @lock.error
-    @unlock.error
-    async def mod_error(self, ctx, error):
-        if isinstance(error, commands.MissingPermissions):
-            await ctx.send("❌ ليس لديك الصلاحيات الكافية لاستخدام هذا الأمر.")
-        elif isinstance(error, commands.MissingRequiredArgument):
-            await ctx.send("❌ يرجى التأكد من كتابة الأمر بشكل صحيح وتحديد العضو/العدد.")
-
-    @commands.hybrid_command(name='warn', help='تحذير عضو')
-    @commands.has_permissions(moderate_members=True)
-    async def warn(self, ctx, member: discord.Member, *, reason: str = "بدون سبب"):
-        import database
-        await database.add_warning(ctx.guild.id, member.id, ctx.author.id, reason)
-        
-        # Log to mod_log if exists
-        logging_cog = self.bot.get_cog('Logging')
-        if logging_cog:
-            log_channel = await logging_cog.get_channel(ctx.guild, "mod_log_id")
-            if log_channel:
-                embed = discord.Embed(title="⚠️ تحذير جديد", color=discord.Color.gold(), timestamp=discord.utils.utcnow())
-                embed.set_author(name=f"{member}", icon_url=member.display_avatar.url)
-                embed.add_field(name="بواسطة", value=ctx.author.mention, inline=True)
-                embed.add_field(name="السبب", value=reason, inline=True)
-                embed.set_footer(text=f"ID: {member.id}")
-                await log_channel.send(embed=embed)
-
-        await ctx.send(f'⚠️ تم تحذير {member.mention}. السبب: {reason}')
-
-    @commands.hybrid_command(name='warnings', help='عرض تحذيرات عضو')
-    @commands.has_permissions(moderate_members=True)
-    async def warnings(self, ctx, member: discord.Member):
-        import database
-        warns = await database.get_warnings(ctx.guild.id, member.id)
-        if not warns:
-            return await ctx.send(f"✅ لا يوجد تحذيرات لـ {member.mention}.")
-            
-        embed = discord.Embed(title=f"📋 تحذيرات {member}", color=discord.Color.orange())
-        for i, warn in enumerate(warns, 1):
-            moderator = ctx.guild.get_member(warn['moderator_id'])
-            mod_text = moderator.mention if moderator else f"ID: {warn['moderator_id']}"
-            embed.add_field(
-                name=f"تحذير {i}", 
-                value=f"**بواسطة:** {mod_text}\n**السبب:** {warn['reason']}\n**التوقيت:** <t:{int(datetime.datetime.fromisoformat(warn['timestamp']).timestamp())}:R>", 
-                inline=False
-            )
-        await ctx.send(embed=embed)
-
-    @commands.hybrid_command(name='clearwarns', help='مسح جميع تحذيرات عضو')
-    @commands.has_permissions(administrator=True)
-    async def clearwarns(self, ctx, member: discord.Member):
-        import database
-        await database.clear_warnings(ctx.guild.id, member.id)
-        await ctx.send(f"✅ تم مسح جميع تحذيرات {member.mention}.")
-
-async def setup(bot):
-    await bot.add_cog(Moderation(bot))
+import discord
+from discord.ext import commands
+from discord import app_commands
+import asyncio
+import datetime
+import re
+import time
+import database
+from ratelimit import WindowCounter
+
+# الرابط ودومينه: http(s)://host/... أو دعوات discord.gg/
+LINK_PATTERN = re.compile(r'https?://([^\s/?#<>]+)|(discord\.gg)/', re.IGNORECASE)
+AUTOMOD_TERM_MAX_LENGTH = 100
+
+# Anti-spam / anti-raid: (عدد الأحداث، خلال كم ثانية)
+SPAM_MESSAGE_LIMIT, SPAM_MESSAGE_WINDOW = 6, 5
+SPAM_DUPLICATE_LIMIT, SPAM_DUPLICATE_WINDOW = 4, 30
+# ردود قصيرة مثل "lol" و"gg" و"هههه" تتكرر طبيعياً، فلا تُحسب في عداد التكرار
+SPAM_DUPLICATE_MIN_LENGTH, SPAM_DUPLICATE_MIN_CHARS = 5, 3
+SPAM_TIMEOUT_MINUTES = 10
+RAID_JOIN_LIMIT, RAID_JOIN_WINDOW = 10, 10
+RAID_LOCKDOWN_MINUTES = 10
+
+async def timeout_member(member, minutes, reason=None):
+    await member.timeout(datetime.timedelta(minutes=minutes), reason=reason)
+
+async def set_send_messages(channel, value, reason=None):
+    # يعدل صلاحية الكتابة لـ @everyone فقط ويبقي باقي صلاحيات القناة كما هي
+    overwrite = channel.overwrites_for(channel.guild.default_role)
+    overwrite.send_messages = value
+    await channel.set_permissions(channel.guild.default_role, overwrite=overwrite, reason=reason)
+
+def _trie_pattern(node):
+    # يحوّل الـ trie إلى regex تُفحص فيه البادئات المشتركة مرة واحدة بدل تجربة كل كلمة على حدة
+    alternatives = []
+    optional = False
+    for char, child in sorted(node.items()):
+        if char == '':
+            optional = True
+        else:
+            alternatives.append(re.escape(char) + _trie_pattern(child))
+    if not alternatives:
+        return ''
+    if len(alternatives) == 1 and not optional:
+        return alternatives[0]
+    pattern = '(?:' + '|'.join(alternatives) + ')'
+    return pattern + '?' if optional else pattern
+
+def compile_words(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return re.compile(r'(?<!\w)' + _trie_pattern(trie) + r'(?!\w)', re.IGNORECASE)
+
+def normalize_term(rule_type, term):
+    term = term.strip().lower()
+    if rule_type != 'deny_word':
+        # يقبل "https://www.example.com/path" ويحفظ "www.example.com"
+        term = term.split('://', 1)[-1].split('/', 1)[0].lstrip('*.').rstrip('.')
+    return term[:AUTOMOD_TERM_MAX_LENGTH]
+
+def _domain_in(domains, host):
+    # a.b.example.com: نفحص كل لاحقة في set، فالتكلفة حسب عدد المقاطع وليس حجم القائمة
+    parts = host.split('.')
+    return any('.'.join(parts[i:]) in domains for i in range(len(parts)))
+
+def _enabled(settings, column):
+    # مفعل افتراضياً: سيرفر بدون صف في guild_settings أو عمود لم يُضبط بعد
+    return settings is None or settings[column] is None or bool(settings[column])
+
+class AutoModMatcher:
+    # قواعد سيرفر واحد مجمّعة مرة واحدة، وتُبنى من جديد فقط عند تعديل القواعد
+    def __init__(self, rules, block_links=True, anti_spam=True, anti_raid=True):
+        self.block_links = block_links
+        # إعدادات السيرفر لباقي الحماية، محفوظة هنا حتى لا تُقرأ مع كل رسالة أو دخول
+        self.anti_spam = anti_spam
+        self.anti_raid = anti_raid
+        self.allowed = set()
+        self.denied = set()
+        words = []
+        for rule in rules:
+            if rule['rule_type'] == 'allow_domain':
+                self.allowed.add(rule['term'])
+            elif rule['rule_type'] == 'deny_domain':
+                self.denied.add(rule['term'])
+            elif rule['rule_type'] == 'deny_word':
+                words.append(rule['term'])
+        self.words = compile_words(words) if words else None
+
+    @property
+    def active(self):
+        return self.block_links or bool(self.denied) or self.words is not None
+
+    def check(self, content):
+        # يرجع نوع المخالفة ('link' أو 'word') أو None
+        if self.block_links or self.denied:
+            for match in LINK_PATTERN.finditer(content):
+                host = (match.group(1) or match.group(2)).lower()
+                host = host.rsplit('@', 1)[-1].split(':', 1)[0].rstrip('.')
+                if _domain_in(self.denied, host):
+                    return 'link'
+                if self.block_links and not _domain_in(self.allowed, host):
+                    return 'link'
+        if self.words is not None and self.words.search(content):
+            return 'word'
+        return None
+
+class Moderation(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self._matchers = {} # guild_id -> AutoModMatcher
+        self._matcher_loads = {} # guild_id -> Task
+        # guild_id -> {member_id: bool} نتيجة فحص الصلاحيات، تُمسح عند تغيير الرتب
+        self._exempt = {}
+        # العدادات في الذاكرة فقط: لا قراءة ولا كتابة في قاعدة البيانات مع كل رسالة
+        self._message_flood = WindowCounter(SPAM_MESSAGE_LIMIT, SPAM_MESSAGE_WINDOW, name='moderation.message_flood')
+        self._duplicate_flood = WindowCounter(SPAM_DUPLICATE_LIMIT, SPAM_DUPLICATE_WINDOW, name='moderation.duplicate_flood')
+        self._join_flood = WindowCounter(RAID_JOIN_LIMIT, RAID_JOIN_WINDOW, name='moderation.join_flood')
+        # guild_id -> {'channels': {channel_id: send_messages قبل القفل}, 'task'}، ونسخة منها في قاعدة البيانات
+        self._lockdowns = {}
+        self._resume_task = None
+
+    async def _load_matcher(self, guild_id):
+        rules = await database.get_automod_rules(guild_id)
+        settings = await database.get_guild_settings(guild_id)
+        matcher = self._matchers[guild_id] = AutoModMatcher(
+            rules, _enabled(settings, 'block_links'), _enabled(settings, 'anti_spam'), _enabled(settings, 'anti_raid')
+        )
+        return matcher
+
+    async def get_matcher(self, guild_id):
+        matcher = self._matchers.get(guild_id)
+        if matcher is None:
+            matcher = await database.coalesce(self._matcher_loads, guild_id, lambda: self._load_matcher(guild_id))
+        return matcher
+
+    def is_exempt(self, member):
+        members = self._exempt.setdefault(member.guild.id, {})
+        exempt = members.get(member.id)
+        if exempt is None:
+            exempt = members[member.id] = member.guild_permissions.manage_messages
+        return exempt
+
+    async def cog_load(self):
+        # on_ready لا يتكرر عند إعادة تحميل الإضافة، فالاستكمال ينتظر جاهزية البوت بنفسه
+        self._resume_task = asyncio.create_task(self.resume_lockdowns())
+
+    def cog_unload(self):
+        # القفل يبقى محفوظاً في قاعدة البيانات ويُستكمل (أو يُنهى) عند التحميل التالي
+        if self._resume_task:
+            self._resume_task.cancel()
+        for lockdown in self._lockdowns.values():
+            if lockdown['task']:
+                lockdown['task'].cancel()
+
+    async def resume_lockdowns(self):
+        await self.bot.wait_until_ready()
+        saved = {}
+        for row in await database.get_lockdown_channels():
+            saved.setdefault(row['guild_id'], []).append(row)
+        for guild_id, rows in saved.items():
+            if guild_id in self._lockdowns:
+                continue
+            lockdown = self._lockdowns[guild_id] = {'channels': {row['channel_id']: row['previous'] for row in rows}, 'task': None}
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                # البوت لم يعد في السيرفر، فلا شيء يمكن إرجاعه
+                self._lockdowns.pop(guild_id, None)
+                await database.clear_lockdown(guild_id)
+                continue
+            remaining = (rows[0]['ends_at'] - discord.utils.utcnow()).total_seconds()
+            lockdown['task'] = asyncio.create_task(self._end_lockdown_later(guild, max(0, remaining) / 60))
+
+    async def send_mod_log(self, guild, embed):
+        logging_cog = self.bot.get_cog('Logging')
+        if logging_cog:
+            log_channel = await logging_cog.get_channel(guild, "mod_log_id")
+            if log_channel:
+                logging_cog.send_log(log_channel, embed)
+
+    def check_spam(self, message):
+        now = time.monotonic()
+        key = (message.guild.id, message.author.id)
+        if self._message_flood.hit(key, now):
+            return "إرسال رسائل كثيرة بسرعة"
+        content = message.content.strip().lower()
+        if len(content) < SPAM_DUPLICATE_MIN_LENGTH or len(set(content.replace(' ', ''))) < SPAM_DUPLICATE_MIN_CHARS:
+            return None
+        if self._duplicate_flood.hit((key, hash(content)), now):
+            return "تكرار نفس الرسالة"
+        return None
+
+    async def punish_spam(self, message, reason):
+        member = message.author
+        try:
+            await timeout_member(member, SPAM_TIMEOUT_MINUTES, reason=f"Anti-spam: {reason}")
+        except discord.HTTPException:
+            return
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+        await message.channel.send(f"🔇 تم إسكات {member.mention} لمدة {SPAM_TIMEOUT_MINUTES} دقيقة. السبب: {reason}", delete_after=10)
+
+        embed = discord.Embed(title="🔇 إسكات تلقائي (Anti-Spam)", color=discord.Color.orange(), timestamp=discord.utils.utcnow())
+        embed.set_author(name=f"{member}", icon_url=member.display_avatar.url)
+        embed.add_field(name="السبب", value=reason, inline=True)
+        embed.add_field(name="القناة", value=message.channel.mention, inline=True)
+        embed.set_footer(text=f"ID: {member.id}")
+        await self.send_mod_log(message.guild, embed)
+
+    async def start_lockdown(self, guild, minutes=RAID_LOCKDOWN_MINUTES):
+        if guild.id in self._lockdowns:
+            return
+        lockdown = self._lockdowns[guild.id] = {'channels': {}, 'task': None}
+        ends_at = discord.utils.utcnow() + datetime.timedelta(minutes=minutes)
+        try:
+            for channel in guild.text_channels:
+                # /endlockdown ربما أنهى القفل أثناء المرور على الرومات
+                if self._lockdowns.get(guild.id) is not lockdown:
+                    return await self._discard_lockdown(guild.id)
+                if not channel.permissions_for(guild.default_role).send_messages:
+                    continue
+                previous = channel.overwrites_for(guild.default_role).send_messages
+                # الحفظ قبل القفل: إرجاع روم لم يُقفل لا يغير شيئاً، أما العكس فيتركه مقفلاً للأبد
+                lockdown['channels'][channel.id] = previous
+                await database.add_lockdown_channel(guild.id, channel.id, previous, ends_at)
+                try:
+                    await set_send_messages(channel, False, reason="Anti-raid lockdown")
+                except discord.HTTPException:
+                    continue
+                if self._lockdowns.get(guild.id) is not lockdown:
+                    # انتهى القفل أثناء هذا الطلب، وربما وصل طلب الإرجاع قبله
+                    try:
+                        await set_send_messages(channel, previous, reason="Anti-raid lockdown ended")
+                    except discord.HTTPException:
+                        pass
+                    return await self._discard_lockdown(guild.id)
+        except Exception as e:
+            # فشل الحفظ مثلاً: فتح ما قُفل وإزالة الحجز، وإلا لن يبدأ قفل جديد لهذا السيرفر أبداً
+            print(f"Lockdown failed in {guild.id}: {e}")
+            if self._lockdowns.get(guild.id) is lockdown:
+                await self.end_lockdown(guild)
+            return
+        lockdown['task'] = asyncio.create_task(self._end_lockdown_later(guild, minutes))
+
+        embed = discord.Embed(
+            title="🚨 تم قفل السيرفر (Anti-Raid)",
+            description=f"دخول {RAID_JOIN_LIMIT} أعضاء خلال {RAID_JOIN_WINDOW} ثانية.\nتم قفل {len(lockdown['channels'])} روم لمدة {minutes} دقيقة.",
+            color=discord.Color.red(),
+            timestamp=discord.utils.utcnow()
+        )
+        await self.send_mod_log(guild, embed)
+
+    async def _discard_lockdown(self, guild_id):
+        # صفوف أُضيفت بعد أن مسحها end_lockdown (ما لم يبدأ قفل جديد في هذه الأثناء)
+        if guild_id not in self._lockdowns:
+            await database.clear_lockdown(guild_id)
+
+    async def _end_lockdown_later(self, guild, minutes):
+        await asyncio.sleep(minutes * 60)
+        await self.end_lockdown(guild)
+
+    async def end_lockdown(self, guild):
+        lockdown = self._lockdowns.pop(guild.id, None)
+        if lockdown is None:
+            return
+        # إرجاع صلاحية الكتابة كما كانت قبل القفل (نسخة لأن start_lockdown ربما ما زال يضيف رومات)
+        for channel_id, previous in list(lockdown['channels'].items()):
+            channel = guild.get_channel(channel_id)
+            if channel:
+                try:
+                    await set_send_messages(channel, previous, reason="Anti-raid lockdown ended")
+                except discord.HTTPException:
+                    pass
+        await database.clear_lockdown(guild.id)
+
+    @commands.hybrid_command(name='kick', help='طرد عضو من السيرفر')
+    @commands.has_permissions(kick_members=True)
+    async def kick(self, ctx, member: discord.Member, *, reason: str = None):
+        await member.kick(reason=reason)
+        await ctx.send(f'✅ تم طرد {member.mention} للسبب: {reason}')
+
+    @commands.hybrid_command(name='ban', help='حظر عضو من السيرفر')
+    @commands.has_permissions(ban_members=True)
+    async def ban(self, ctx, member: discord.Member, *, reason: str = None):
+        await member.ban(reason=reason)
+        await ctx.send(f'⛔ تم حظر {member.mention} للسبب: {reason}')
+
+    @commands.hybrid_command(name='unban', help='إزالة الحظر عن عضو')
+    @commands.has_permissions(ban_members=True)
+    async def unban(self, ctx, *, member_id: str):
+        try:
+            user = await self.bot.fetch_user(int(member_id))
+            await ctx.guild.unban(user)
+            await ctx.send(f'✅ تم إزالة الحظر عن {user.mention}')
+        except Exception as e:
+            await ctx.send(f'❌ حدث خطأ: {e}')
+
+    @commands.hybrid_command(name='purge', aliases=['clear'], help='مسح عدد معين من الرسائل')
+    @commands.has_permissions(manage_messages=True)
+    async def purge(self, ctx, amount: int):
+        await ctx.channel.purge(limit=amount + 1)
+        # رسالة مؤقتة وتختفي
+        await ctx.send(f'🧹 تم مسح {amount} رسالة.', delete_after=5)
+
+    @commands.hybrid_command(name='mute', help='إسكات عضو (Timeout) لمدة معينة بالدقائق')
+    @commands.has_permissions(moderate_members=True)
+    async def mute(self, ctx, member: discord.Member, minutes: int, *, reason: str = "No reason"):
+        await timeout_member(member, minutes, reason=reason)
+        await ctx.send(f'🔇 تم إسكات {member.mention} لمدة {minutes} دقيقة. السبب: {reason}')
+
+    @commands.hybrid_command(name='unmute', help='إزالة الإسكات عن عضو')
+    @commands.has_permissions(moderate_members=True)
+    async def unmute(self, ctx, member: discord.Member):
+        await member.timeout(None)
+        await ctx.send(f'🔊 تم إزالة الإسكات عن {member.mention}')
+
+    @commands.hybrid_command(name='lock', help='قفل الروم لمنع الكتابة')
+    @commands.has_permissions(manage_channels=True)
+    async def lock(self, ctx):
+        await set_send_messages(ctx.channel, False)
+        await ctx.send(f'🔒 تم قفل القناة {ctx.channel.mention}')
+
+    @commands.hybrid_command(name='unlock', help='فتح الروم للكتابة')
+    @commands.has_permissions(manage_channels=True)
+    async def unlock(self, ctx):
+        await set_send_messages(ctx.channel, True)
+        await ctx.send(f'🔓 تم فتح القناة {ctx.channel.mention}')
+
+    @commands.hybrid_command(name='endlockdown', help='إنهاء قفل السيرفر التلقائي (Anti-Raid) قبل موعده')
+    @commands.has_permissions(manage_channels=True)
+    async def endlockdown(self, ctx):
+        lockdown = self._lockdowns.get(ctx.guild.id)
+        if lockdown is None:
+            return await ctx.send("❌ السيرفر ليس في وضع القفل.")
+        if lockdown['task']:
+            lockdown['task'].cancel()
+        await self.end_lockdown(ctx.guild)
+        await ctx.send("🔓 تم إنهاء قفل السيرفر.")
+
+    @commands.hybrid_command(name='slowmode', help='تفعيل وضع البطء في القناة')
+    @commands.has_permissions(manage_channels=True)
+    async def slowmode(self, ctx, seconds: int):
+        await ctx.channel.edit(slowmode_delay=seconds)
+        await ctx.send(f'⏳ تم ضبط وضع البطء إلى {seconds} ثانية.')
+
+    @commands.hybrid_command(name='nick', help='تغيير لقب عضو')
+    @commands.has_permissions(manage_nicknames=True)
+    async def nick(self, ctx, member: discord.Member, *, nickname: str = None):
+        await member.edit(nick=nickname)
+        await ctx.send(f'✅ تم تغيير لقب {member.mention} إلى {nickname or "الافتراضي"}.')
+
+    # Auto-Mod: سبام وروابط ودومينات وكلمات ممنوعة (يمكن تعطيل السبام ومنع الروابط عبر /automod spam و /automod links)
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or not isinstance(message.author, discord.Member):
+            return
+
+        matcher = await self.get_matcher(message.guild.id)
+        if matcher.anti_spam:
+            spam = self.check_spam(message)
+            if spam is not None and not self.is_exempt(message.author):
+                return await self.punish_spam(message, spam)
+
+        if not matcher.active:
+            return
+        violation = matcher.check(message.content)
+        # فحص الصلاحيات فقط للرسائل المخالفة، ونتيجته محفوظة حتى تتغير رتب العضو
+        if violation is None or self.is_exempt(message.author):
+            return
+
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            return
+        if violation == 'link':
+            text = "يمنع إرسال الروابط في هذا السيرفر!"
+        else:
+            text = "رسالتك تحتوي على كلمة ممنوعة في هذا السيرفر!"
+        await message.channel.send(f"⚠️ {message.author.mention}, {text}", delete_after=5)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            self._exempt.get(after.guild.id, {}).pop(after.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        matcher = await self.get_matcher(member.guild.id)
+        if matcher.anti_raid and self._join_flood.hit(member.guild.id, time.monotonic()):
+            await self.start_lockdown(member.guild)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self._exempt.get(member.guild.id, {}).pop(member.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.permissions != after.permissions:
+            self._exempt.pop(after.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self._exempt.pop(role.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before, after):
+        if before.owner_id != after.owner_id:
+            self._exempt.pop(after.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self._matchers.pop(guild.id, None)
+        self._exempt.pop(guild.id, None)
+
+    automod_group = app_commands.Group(name="automod", description="إعدادات الحماية التلقائية (روابط وكلمات وسبام وريد)", guild_only=True)
+
+    rule_choices = [
+        app_commands.Choice(name="دومين مسموح", value="allow_domain"),
+        app_commands.Choice(name="دومين ممنوع", value="deny_domain"),
+        app_commands.Choice(name="كلمة ممنوعة", value="deny_word"),
+    ]
+
+    @automod_group.command(name="add", description="إضافة دومين أو كلمة لقوائم الحماية")
+    @app_commands.describe(rule_type="نوع القاعدة", term="الدومين (مثال: youtube.com) أو الكلمة")
+    @app_commands.choices(rule_type=rule_choices)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def automod_add(self, interaction: discord.Interaction, rule_type: str, term: str):
+        term = normalize_term(rule_type, term)
+        if not term:
+            return await interaction.response.send_message("❌ القيمة غير صالحة.", ephemeral=True)
+        await database.add_automod_rule(interaction.guild.id, rule_type, term)
+        self._matchers.pop(interaction.guild.id, None)
+        await interaction.response.send_message(f"✅ تم إضافة `{term}`.", ephemeral=True)
+
+    @automod_group.command(name="remove", description="إزالة دومين أو كلمة من قوائم الحماية")
+    @app_commands.describe(rule_type="نوع القاعدة", term="الدومين أو الكلمة")
+    @app_commands.choices(rule_type=rule_choices)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def automod_remove(self, interaction: discord.Interaction, rule_type: str, term: str):
+        term = normalize_term(rule_type, term)
+        await database.remove_automod_rule(interaction.guild.id, rule_type, term)
+        self._matchers.pop(interaction.guild.id, None)
+        await interaction.response.send_message(f"✅ تم إزالة `{term}`.", ephemeral=True)
+
+    @automod_group.command(name="list", description="عرض قواعد الحماية التلقائية")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def automod_list(self, interaction: discord.Interaction):
+        rules = await database.get_automod_rules(interaction.guild.id)
+        matcher = await self.get_matcher(interaction.guild.id)
+        embed = discord.Embed(title="🛡️ قواعد الحماية التلقائية", color=discord.Color.blue())
+        embed.add_field(name="منع الروابط", value="مفعل" if matcher.block_links else "معطل", inline=False)
+        embed.add_field(name="الحماية من السبام", value="مفعل" if matcher.anti_spam else "معطل", inline=True)
+        embed.add_field(name="الحماية من الريد", value="مفعل" if matcher.anti_raid else "معطل", inline=True)
+        for choice in self.rule_choices:
+            terms = sorted(rule['term'] for rule in rules if rule['rule_type'] == choice.value)
+            value = ", ".join(f"`{t}`" for t in terms) or "لا يوجد"
+            if len(value) > 1024:
+                value = value[:1020] + " ..."
+            embed.add_field(name=f"{choice.name} ({len(terms)})", value=value, inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @automod_group.command(name="links", description="تفعيل أو تعطيل منع الروابط (الدومينات الممنوعة تبقى ممنوعة)")
+    @app_commands.describe(enabled="منع كل الروابط غير المسموحة")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def automod_links(self, interaction: discord.Interaction, enabled: bool):
+        await database.set_block_links(interaction.guild.id, enabled)
+        self._matchers.pop(interaction.guild.id, None)
+        await interaction.response.send_message(f"✅ تم {'تفعيل' if enabled else 'تعطيل'} منع الروابط.", ephemeral=True)
+
+    @automod_group.command(name="spam", description="تفعيل أو تعطيل الإسكات التلقائي عند السبام")
+    @app_commands.describe(enabled="إسكات من يرسل رسائل كثيرة بسرعة أو يكرر نفس الرسالة")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def automod_spam(self, interaction: discord.Interaction, enabled: bool):
+        await database.set_anti_spam(interaction.guild.id, enabled)
+        self._matchers.pop(interaction.guild.id, None)
+        await interaction.response.send_message(f"✅ تم {'تفعيل' if enabled else 'تعطيل'} الحماية من السبام.", ephemeral=True)
+
+    @automod_group.command(name="raid", description="تفعيل أو تعطيل قفل السيرفر التلقائي عند دخول أعضاء كثيرين")
+    @app_commands.describe(enabled=f"قفل الرومات عند دخول {RAID_JOIN_LIMIT} أعضاء خلال {RAID_JOIN_WINDOW} ثانية")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def automod_raid(self, interaction: discord.Interaction, enabled: bool):
+        await database.set_anti_raid(interaction.guild.id, enabled)
+        self._matchers.pop(interaction.guild.id, None)
+        await interaction.response.send_message(f"✅ تم {'تفعيل' if enabled else 'تعطيل'} الحماية من الريد.", ephemeral=True)
+
+    # Error Handling for permissions
+    @kick.error
+    @ban.error
+    @purge.error
+    @mute.error
+    @lock.error
+    @unlock.error
+    async def mod_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("❌ ليس لديك الصلاحيات الكافية لاستخدام هذا الأمر.")
+        elif isinstance(error, commands.MissingRequiredArgument):
+            await ctx.send("❌ يرجى التأكد من كتابة الأمر بشكل صحيح وتحديد العضو/العدد.")
+
+    @commands.hybrid_command(name='warn', help='تحذير عضو')
+    @commands.has_permissions(moderate_members=True)
+    async def warn(self, ctx, member: discord.Member, *, reason: str = "بدون سبب"):
+        await database.add_warning(ctx.guild.id, member.id, ctx.author.id, reason)
+        
+        # Log to mod_log if exists
+        logging_cog = self.bot.get_cog('Logging')
+        if logging_cog:
+            log_channel = await logging_cog.get_channel(ctx.guild, "mod_log_id")
+            if log_channel:
+                embed = discord.Embed(title="⚠️ تحذير جديد", color=discord.Color.gold(), timestamp=discord.utils.utcnow())
+                embed.set_author(name=f"{member}", icon_url=member.display_avatar.url)
+                embed.add_field(name="بواسطة", value=ctx.author.mention, inline=True)
+                embed.add_field(name="السبب", value=reason, inline=True)
+                embed.set_footer(text=f"ID: {member.id}")
+                logging_cog.send_log(log_channel, embed)
+
+        await ctx.send(f'⚠️ تم تحذير {member.mention}. السبب: {reason}')
+
+    @commands.hybrid_command(name='warnings', help='عرض تحذيرات عضو')
+    @commands.has_permissions(moderate_members=True)
+    async def warnings(self, ctx, member: discord.Member):
+        warns = await database.get_warnings(ctx.guild.id, member.id)
+        if not warns:
+            return await ctx.send(f"✅ لا يوجد تحذيرات لـ {member.mention}.")
+            
+        embed = discord.Embed(title=f"📋 تحذيرات {member}", color=discord.Color.orange())
+        for i, warn in enumerate(warns, 1):
+            moderator = ctx.guild.get_member(warn['moderator_id'])
+            mod_text = moderator.mention if moderator else f"ID: {warn['moderator_id']}"
+            embed.add_field(
+                name=f"تحذير {i}", 
+                value=f"**بواسطة:** {mod_text}\n**السبب:** {warn['reason']}\n**التوقيت:** <t:{int(datetime.datetime.fromisoformat(warn['timestamp']).timestamp())}:R>", 
+                inline=False
+            )
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(name='clearwarns', help='مسح جميع تحذيرات عضو')
+    @commands.has_permissions(administrator=True)
+    async def clearwarns(self, ctx, member: discord.Member):
+        await database.clear_warnings(ctx.guild.id, member.id)
+        await ctx.send(f"✅ تم مسح جميع تحذيرات {member.mention}.")
+
+async def setup(bot):
+    await bot.add_cog(Moderation(bot))
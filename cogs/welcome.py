@@ -1,109 +1,243 @@
-import discord
-from discord.ext import commands
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import io
-import aiohttp
-
-class Welcome(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
-
-    async def create_welcome_card(self, member):
-        # Load background
-        try:
-            background = Image.open("welcome.png").convert("RGBA")
-        except:
-            # Fallback if image not found
-            background = Image.new("RGBA", (1024, 500), (47, 49, 54, 255))
-
-        # Size of background
-        width, height = background.size
-
-        # Load avatar
-        avatar_url = member.display_avatar.url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(avatar_url) as resp:
-                if resp.status == 200:
-                    avatar_bytes = await resp.read()
-                    avatar_image = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA")
-                else:
-                    avatar_image = Image.new("RGBA", (200, 200), (255, 255, 255, 255))
-
-        # Resize avatar and make it circular
-        avatar_size = 180
-        avatar_image = avatar_image.resize((avatar_size, avatar_size))
-        
-        # Create mask for circular avatar
-        mask = Image.new("L", (avatar_size, avatar_size), 0)
-        draw_mask = ImageDraw.Draw(mask)
-        draw_mask.ellipse((0, 0, avatar_size, avatar_size), fill=255)
-        
-        output_avatar = ImageOps.fit(avatar_image, mask.size, centering=(0.5, 0.5))
-        output_avatar.putalpha(mask)
-
-        # Paste avatar onto background (centered)
-        avatar_x = (width - avatar_size) // 2
-        avatar_y = (height - avatar_size) // 2 + 50 # Slightly below center
-        background.paste(output_avatar, (avatar_x, avatar_y), output_avatar)
-
-        # Draw text
-        draw = ImageDraw.Draw(background)
-        
-        # Try to find a font
-        try:
-            font_title = ImageFont.truetype("arial.ttf", 60)
-            font_subtitle = ImageFont.truetype("arial.ttf", 40)
-        except:
-            font_title = ImageFont.load_default()
-            font_subtitle = ImageFont.load_default()
-
-        # Welcome text is already in background, let's add username
-        name_text = f"{member.name}"
-        member_text = f"Member #{member.guild.member_count}"
-        
-        # Calculate text position
-        name_bbox = draw.textbbox((0, 0), name_text, font=font_title)
-        name_w = name_bbox[2] - name_bbox[0]
-        name_x = (width - name_w) // 2
-        name_y = avatar_y + avatar_size + 20
-        
-        member_bbox = draw.textbbox((0, 0), member_text, font=font_subtitle)
-        member_w = member_bbox[2] - member_bbox[0]
-        member_x = (width - member_w) // 2
-        member_y = name_y + 70
-
-        # Draw shadow then text
-        draw.text((name_x+2, name_y+2), name_text, font=font_title, fill=(0, 0, 0, 150))
-        draw.text((name_x, name_y), name_text, font=font_title, fill=(255, 255, 255, 255))
-        
-        draw.text((member_x+2, member_y+2), member_text, font=font_subtitle, fill=(0, 0, 0, 150))
-        draw.text((member_x, member_y), member_text, font=font_subtitle, fill=(200, 200, 200, 255))
-
-        # Save to buffer
-        buffer = io.BytesIO()
-        background.save(buffer, format="PNG")
-        buffer.seek(0)
-        return buffer
-
-    @commands.Cog.listener()
-    async def on_member_join(self, member):
-        channel = discord.utils.get(member.guild.text_channels, name="welcome") or \
-                  discord.utils.get(member.guild.text_channels, name="general") or \
-                  discord.utils.get(member.guild.text_channels, name="ترحيب")
-        
-        if channel:
-            buffer = await self.create_welcome_card(member)
-            file = discord.File(fp=buffer, filename="welcome.png")
-            
-            embed = discord.Embed(
-                title=f"أهلاً بك في {member.guild.name}!",
-                description=f"مرحباً بك {member.mention} في سيرفرنا المتواضع. نتمنى لك وقتاً ممتعاً!",
-                color=0x9b59b6
-            )
-            embed.set_image(url="attachment://welcome.png")
-            embed.set_footer(text=f"ID: {member.id}")
-            
-            await channel.send(embed=embed, file=file)
-
-async def setup(bot):
-    await bot.add_cog(Welcome(bot))
+import discord
+from discord.ext import commands
+from discord import app_commands
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+import multiprocessing
+import asyncio
+import io
+import os
+import aiohttp
+
+# الرسم يتم في عمليات منفصلة حتى لا يتوقف الـ event loop (والـ heartbeat) أثناء موجات الدخول
+WELCOME_RENDER_WORKERS = int(os.getenv('WELCOME_RENDER_WORKERS', 2))
+WELCOME_RENDER_QUEUE = 20 # أقصى عدد بطاقات قيد الرسم أو الانتظار
+WELCOME_RENDER_TIMEOUT = 10 # ثواني، من بداية الرسم نفسه وليس من دخول الطابور
+AVATAR_CACHE_SIZE = 128 # عدد الصور الشخصية الجاهزة المحفوظة (~130KB لكل صورة)
+
+WELCOME_BACKGROUND = "welcome.png"
+AVATAR_SIZE = 180
+
+# أصول الرسم تُحمّل مرة واحدة في كل عملية رسم (عند بدايتها) بدل كل دخول عضو
+_background = None
+_avatar_mask = None
+_fonts = {}
+
+def load_welcome_assets():
+    global _background, _avatar_mask
+    # Load background
+    try:
+        with Image.open(WELCOME_BACKGROUND) as image:
+            _background = image.convert("RGBA")
+    except:
+        # Fallback if image not found
+        _background = Image.new("RGBA", (1024, 500), (47, 49, 54, 255))
+
+    # Create mask for circular avatar
+    _avatar_mask = Image.new("L", (AVATAR_SIZE, AVATAR_SIZE), 0)
+    draw_mask = ImageDraw.Draw(_avatar_mask)
+    draw_mask.ellipse((0, 0, AVATAR_SIZE, AVATAR_SIZE), fill=255)
+
+    # Try to find a font
+    _fonts.clear()
+    for size in (60, 40):
+        try:
+            _fonts[size] = ImageFont.truetype("arial.ttf", size)
+        except:
+            _fonts[size] = ImageFont.load_default()
+
+def render_welcome_card(avatar_bytes, avatar_rgba, name_text, member_text):
+    # avatar_rgba: صورة دائرية جاهزة (من الكاش)، وإلا يتم تجهيزها من avatar_bytes
+    # يرجع (PNG البطاقة، الصورة الدائرية الجاهزة لحفظها في الكاش)
+    if _background is None:
+        load_welcome_assets()
+
+    background = _background.copy()
+
+    # Size of background
+    width, height = background.size
+
+    if avatar_rgba:
+        output_avatar = Image.frombytes("RGBA", (AVATAR_SIZE, AVATAR_SIZE), avatar_rgba)
+    else:
+        # Load avatar
+        if avatar_bytes:
+            avatar_image = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA")
+        else:
+            avatar_image = Image.new("RGBA", (200, 200), (255, 255, 255, 255))
+
+        # Resize avatar and make it circular
+        output_avatar = ImageOps.fit(avatar_image, (AVATAR_SIZE, AVATAR_SIZE), centering=(0.5, 0.5))
+        output_avatar.putalpha(_avatar_mask)
+        avatar_rgba = output_avatar.tobytes()
+
+    # Paste avatar onto background (centered)
+    avatar_x = (width - AVATAR_SIZE) // 2
+    avatar_y = (height - AVATAR_SIZE) // 2 + 50 # Slightly below center
+    background.paste(output_avatar, (avatar_x, avatar_y), output_avatar)
+
+    # Draw text
+    draw = ImageDraw.Draw(background)
+    font_title = _fonts[60]
+    font_subtitle = _fonts[40]
+
+    # Calculate text position
+    name_bbox = draw.textbbox((0, 0), name_text, font=font_title)
+    name_w = name_bbox[2] - name_bbox[0]
+    name_x = (width - name_w) // 2
+    name_y = avatar_y + AVATAR_SIZE + 20
+
+    member_bbox = draw.textbbox((0, 0), member_text, font=font_subtitle)
+    member_w = member_bbox[2] - member_bbox[0]
+    member_x = (width - member_w) // 2
+    member_y = name_y + 70
+
+    # Draw shadow then text
+    draw.text((name_x+2, name_y+2), name_text, font=font_title, fill=(0, 0, 0, 150))
+    draw.text((name_x, name_y), name_text, font=font_title, fill=(255, 255, 255, 255))
+
+    draw.text((member_x+2, member_y+2), member_text, font=font_subtitle, fill=(0, 0, 0, 150))
+    draw.text((member_x, member_y), member_text, font=font_subtitle, fill=(200, 200, 200, 255))
+
+    # Save to buffer
+    buffer = io.BytesIO()
+    background.save(buffer, format="PNG")
+    return buffer.getvalue(), avatar_rgba
+
+class Welcome(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self._pool = None
+        self._render_slots = asyncio.Semaphore(WELCOME_RENDER_QUEUE)
+        # بطاقة واحدة لكل عملية رسم، والباقي ينتظر هنا وليس داخل الـ pool حيث يُحسب انتظاره من الـ timeout
+        self._render_workers = asyncio.Semaphore(WELCOME_RENDER_WORKERS)
+        self._restart_task = None
+        # avatar key (hash) -> RGBA bytes للصورة الدائرية بعد تصغيرها
+        self._avatar_cache = OrderedDict()
+
+    async def cog_load(self):
+        await self._start_pool()
+
+    async def cog_unload(self):
+        if self._restart_task and not self._restart_task.done():
+            self._restart_task.cancel()
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _start_pool(self):
+        # spawn بدل fork لأن عملية البوت فيها threads (aiosqlite) و event loop
+        pool = ProcessPoolExecutor(
+            max_workers=WELCOME_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=load_welcome_assets
+        )
+        # تشغيل عملية واحدة على الأقل الآن حتى تكون الأصول جاهزة قبل أول دخول
+        try:
+            await asyncio.get_running_loop().run_in_executor(pool, os.getpid)
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        old_pool, self._pool = self._pool, pool
+        if old_pool:
+            old_pool.shutdown(wait=False)
+
+    async def _restart_pool(self, broken):
+        # عملية رسم ماتت (نفاد الذاكرة مثلاً) فتعطل الـ pool كله
+        if self._pool is not broken:
+            return
+        try:
+            await self._start_pool()
+        except Exception as e:
+            print(f"Welcome render pool restart failed: {e}")
+
+    @app_commands.command(name="reload-welcome", description="إعادة تحميل صورة وخطوط بطاقة الترحيب بعد تغييرها")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def reload_welcome(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        await self._start_pool()
+        await interaction.followup.send("✅ تم إعادة تحميل بطاقة الترحيب.")
+
+    async def create_welcome_card(self, member):
+        # الطابور ممتلئ (موجة دخول كبيرة)، نرسل الترحيب بدون صورة
+        if self._render_slots.locked():
+            return None
+
+        async with self._render_slots:
+            avatar_key = member.display_avatar.key
+            avatar_rgba = self._avatar_cache.get(avatar_key)
+            avatar_bytes = None
+            if avatar_rgba:
+                self._avatar_cache.move_to_end(avatar_key)
+            else:
+                # Load avatar
+                try:
+                    async with self.bot.http_session.get(member.display_avatar.url) as resp:
+                        if resp.status == 200:
+                            avatar_bytes = await resp.read()
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    pass
+
+            # Welcome text is already in background, let's add username
+            name_text = f"{member.name}"
+            member_text = f"Member #{member.guild.member_count}"
+
+            await self._render_workers.acquire()
+            pool = self._pool
+            try:
+                try:
+                    if pool is None:
+                        raise BrokenProcessPool("welcome render pool is not running")
+                    future = asyncio.get_running_loop().run_in_executor(
+                        pool, render_welcome_card, avatar_bytes, avatar_rgba, name_text, member_text
+                    )
+                except BaseException:
+                    self._render_workers.release()
+                    raise
+                # الرسم لا يتوقف بإلغاء انتظاره، فالمكان يُحرر عندما تنتهي العملية منه فعلاً
+                future.add_done_callback(lambda _: self._render_workers.release())
+                data, rendered_avatar = await asyncio.wait_for(asyncio.shield(future), WELCOME_RENDER_TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"Welcome card render timed out for {member.id}")
+                return None
+            except BrokenProcessPool:
+                # الترحيب يُرسل بدون صورة، والـ pool يُبنى من جديد مرة واحدة مهما كان عدد البطاقات التي فشلت
+                print(f"Welcome render pool is broken, sending the card for {member.id} without an image")
+                if pool is not None and (self._restart_task is None or self._restart_task.done()):
+                    self._restart_task = asyncio.create_task(self._restart_pool(pool))
+                return None
+
+            if avatar_bytes:
+                self._avatar_cache[avatar_key] = rendered_avatar
+                if len(self._avatar_cache) > AVATAR_CACHE_SIZE:
+                    self._avatar_cache.popitem(last=False)
+            return io.BytesIO(data)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        channel = discord.utils.get(member.guild.text_channels, name="welcome") or \
+                  discord.utils.get(member.guild.text_channels, name="general") or \
+                  discord.utils.get(member.guild.text_channels, name="ترحيب")
+        
+        if channel:
+            buffer = await self.create_welcome_card(member)
+
+            embed = discord.Embed(
+                title=f"أهلاً بك في {member.guild.name}!",
+                description=f"مرحباً بك {member.mention} في سيرفرنا المتواضع. نتمنى لك وقتاً ممتعاً!",
+                color=0x9b59b6
+            )
+            embed.set_footer(text=f"ID: {member.id}")
+
+            if buffer:
+                file = discord.File(fp=buffer, filename="welcome.png")
+                embed.set_image(url="attachment://welcome.png")
+                await channel.send(embed=embed, file=file)
+            else:
+                await channel.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Welcome(bot))
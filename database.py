@@ -1,279 +1,997 @@
-import aiosqlite
-import asyncpg
-import os
-import discord
-from dotenv import load_dotenv
-
-load_dotenv()
-
-DB_PATH = 'bot_database.db'
-DATABASE_URL = os.getenv('DATABASE_URL')
-
-# Global pool for PostgreSQL
-_pool = None
-
-async def get_connection():
-    if DATABASE_URL:
-        global _pool
-        if _pool is None:
-            _pool = await asyncpg.create_pool(DATABASE_URL)
-        return _pool
-    else:
-        return await aiosqlite.connect(DB_PATH)
-
-async def execute(query, *args):
-    if DATABASE_URL:
-        pool = await get_connection()
-        async with pool.acquire() as conn:
-            # PostgreSQL uses $1, $2 instead of ?
-            query = query.replace('?', '${}')
-            query = query.format(*range(1, 100)) # Simple hack for small queries
-            await conn.execute(query, *args)
-    else:
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute(query, args)
-            await db.commit()
-
-# --- Refactoring to a cleaner structure ---
-
-class Database:
-    def __init__(self):
-        self.is_pg = DATABASE_URL is not None
-        self.pool = None
-
-    async def connect(self):
-        if self.is_pg and not self.pool:
-            self.pool = await asyncpg.create_pool(DATABASE_URL)
-
-    def _convert_query(self, query):
-        if not self.is_pg:
-            return query
-        # Convert ? to $1, $2, etc.
-        count = 1
-        while '?' in query:
-            query = query.replace('?', f'${count}', 1)
-            count += 1
-        return query
-
-    async def execute(self, query, *args):
-        await self.connect()
-        query = self._convert_query(query)
-        if self.is_pg:
-            async with self.pool.acquire() as conn:
-                await conn.execute(query, *args)
-        else:
-            async with aiosqlite.connect(DB_PATH) as db:
-                await db.execute(query, args)
-                await db.commit()
-
-    async def fetchone(self, query, *args):
-        await self.connect()
-        query = self._convert_query(query)
-        if self.is_pg:
-            async with self.pool.acquire() as conn:
-                row = await conn.fetchrow(query, *args)
-                return dict(row) if row else None
-        else:
-            async with aiosqlite.connect(DB_PATH) as db:
-                db.row_factory = aiosqlite.Row
-                async with db.execute(query, args) as cursor:
-                    row = await cursor.fetchone()
-                    return dict(row) if row else None
-
-    async def fetchall(self, query, *args):
-        await self.connect()
-        query = self._convert_query(query)
-        if self.is_pg:
-            async with self.pool.acquire() as conn:
-                rows = await conn.fetch(query, *args)
-                return [dict(r) for r in rows]
-        else:
-            async with aiosqlite.connect(DB_PATH) as db:
-                db.row_factory = aiosqlite.Row
-                async with db.execute(query, args) as cursor:
-                    rows = await cursor.fetchall()
-                    return [dict(r) for r in rows]
-
-db_manager = Database()
-
-async def init_db():
-    # Initial tables setup
-    queries = [
-        '''CREATE TABLE IF NOT EXISTS users (
-            user_id BIGINT PRIMARY KEY,
-            credits INTEGER DEFAULT 0,
-            xp INTEGER DEFAULT 0,
-            level INTEGER DEFAULT 0,
-            last_daily TEXT,
-            rep INTEGER DEFAULT 0
-        )''',
-        '''CREATE TABLE IF NOT EXISTS ticket_settings (
-            guild_id BIGINT PRIMARY KEY,
-            category_id BIGINT,
-            logs_channel_id BIGINT,
-            staff_role_id BIGINT,
-            staff_app_role_id BIGINT,
-            inquiry_role_id BIGINT,
-            complaint_role_id BIGINT,
-            girl_verif_role_id BIGINT
-        )''',
-        '''CREATE TABLE IF NOT EXISTS guild_settings (
-            guild_id BIGINT PRIMARY KEY,
-            leveling_channel_id BIGINT,
-            ticket_counter INTEGER DEFAULT 0
-        )''',
-        '''CREATE TABLE IF NOT EXISTS logging_settings (
-            guild_id BIGINT PRIMARY KEY,
-            msg_log_id BIGINT,
-            role_log_id BIGINT,
-            server_log_id BIGINT,
-            room_log_id BIGINT,
-            voice_log_id BIGINT,
-            mod_log_id BIGINT
-        )''',
-        '''CREATE TABLE IF NOT EXISTS warnings (
-            warn_id SERIAL PRIMARY KEY if_pg,
-            guild_id BIGINT,
-            user_id BIGINT,
-            moderator_id BIGINT,
-            reason TEXT,
-            timestamp TEXT
-        )''',
-        '''CREATE TABLE IF NOT EXISTS command_aliases (
-            guild_id BIGINT,
-            alias TEXT,
-            command_name TEXT,
-            PRIMARY KEY (guild_id, alias)
-        )'''
-    ]
-    
-    # Simple fix for SERIAL vs AUTOINCREMENT
-    for q in queries:
-        if db_manager.is_pg:
-            q = q.replace('SERIAL PRIMARY KEY if_pg', 'SERIAL PRIMARY KEY')
-            q = q.replace('INTEGER PRIMARY KEY AUTOINCREMENT', 'SERIAL PRIMARY KEY')
-        else:
-            q = q.replace('SERIAL PRIMARY KEY if_pg', 'INTEGER PRIMARY KEY AUTOINCREMENT')
-            q = q.replace('BIGINT', 'INTEGER') # SQLite works with INTEGER for IDs
-        await db_manager.execute(q)
-
-    # Migrations for SQLite (PG usually starts fresh or handles this via external tools, but we can add basic check)
-    if not db_manager.is_pg:
-        async with aiosqlite.connect(DB_PATH) as db:
-            # Check logging_settings
-            async with db.execute("PRAGMA table_info(logging_settings)") as cursor:
-                columns = [column[1] for column in await cursor.fetchall()]
-                if 'voice_log_id' not in columns:
-                    await db.execute('ALTER TABLE logging_settings ADD COLUMN voice_log_id INTEGER')
-                    await db.commit()
-            
-            # Check ticket_settings
-            async with db.execute("PRAGMA table_info(ticket_settings)") as cursor:
-                columns = [column[1] for column in await cursor.fetchall()]
-                to_add = {
-                    'staff_app_role_id': 'INTEGER',
-                    'inquiry_role_id': 'INTEGER',
-                    'complaint_role_id': 'INTEGER',
-                    'girl_verif_role_id': 'INTEGER'
-                }
-                for col, type in to_add.items():
-                    if col not in columns:
-                        await db.execute(f'ALTER TABLE ticket_settings ADD COLUMN {col} {type}')
-                await db.commit()
-
-# Helper functions mapped to the new db_manager
-async def get_ticket_settings(guild_id):
-    return await db_manager.fetchone('SELECT * FROM ticket_settings WHERE guild_id = ?', guild_id)
-
-async def set_ticket_settings(guild_id, category_id, logs_channel_id, staff_role_id, staff_app_role_id, inquiry_role_id=None, complaint_role_id=None, girl_verif_role_id=None):
-    if db_manager.is_pg:
-        query = '''INSERT INTO ticket_settings (guild_id, category_id, logs_channel_id, staff_role_id, staff_app_role_id, inquiry_role_id, complaint_role_id, girl_verif_role_id)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                   ON CONFLICT(guild_id) DO UPDATE SET 
-                   category_id=EXCLUDED.category_id, logs_channel_id=EXCLUDED.logs_channel_id, 
-                   staff_role_id=EXCLUDED.staff_role_id, staff_app_role_id=EXCLUDED.staff_app_role_id,
-                   inquiry_role_id=EXCLUDED.inquiry_role_id, complaint_role_id=EXCLUDED.complaint_role_id,
-                   girl_verif_role_id=EXCLUDED.girl_verif_role_id'''
-    else:
-        query = 'INSERT OR REPLACE INTO ticket_settings (guild_id, category_id, logs_channel_id, staff_role_id, staff_app_role_id, inquiry_role_id, complaint_role_id, girl_verif_role_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
-    await db_manager.execute(query, guild_id, category_id, logs_channel_id, staff_role_id, staff_app_role_id, inquiry_role_id, complaint_role_id, girl_verif_role_id)
-
-async def get_guild_settings(guild_id):
-    return await db_manager.fetchone('SELECT * FROM guild_settings WHERE guild_id = ?', guild_id)
-
-async def set_leveling_channel(guild_id, channel_id):
-    if db_manager.is_pg:
-        query = 'INSERT INTO guild_settings (guild_id, leveling_channel_id) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET leveling_channel_id = EXCLUDED.leveling_channel_id'
-    else:
-        query = 'INSERT INTO guild_settings (guild_id, leveling_channel_id) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET leveling_channel_id = EXCLUDED.leveling_channel_id'
-    await db_manager.execute(query, guild_id, channel_id)
-
-async def get_and_increment_ticket_count(guild_id):
-    row = await db_manager.fetchone('SELECT ticket_counter FROM guild_settings WHERE guild_id = ?', guild_id)
-    if row is None:
-        new_count = 1
-        await db_manager.execute('INSERT INTO guild_settings (guild_id, ticket_counter) VALUES (?, ?)', guild_id, new_count)
-    else:
-        new_count = (row['ticket_counter'] or 0) + 1
-        await db_manager.execute('UPDATE guild_settings SET ticket_counter = ? WHERE guild_id = ?', new_count, guild_id)
-    return new_count
-
-async def get_user(user_id):
-    return await db_manager.fetchone('SELECT * FROM users WHERE user_id = ?', user_id)
-
-async def create_user(user_id):
-    if db_manager.is_pg:
-        await db_manager.execute('INSERT INTO users (user_id) VALUES (?) ON CONFLICT DO NOTHING', user_id)
-    else:
-        await db_manager.execute('INSERT OR IGNORE INTO users (user_id) VALUES (?)', user_id)
-
-async def update_credits(user_id, amount):
-    await db_manager.execute('UPDATE users SET credits = credits + ? WHERE user_id = ?', amount, user_id)
-
-async def set_last_daily(user_id, date_str):
-    await db_manager.execute('UPDATE users SET last_daily = ? WHERE user_id = ?', date_str, user_id)
-
-async def add_xp(user_id, amount):
-    await db_manager.execute('UPDATE users SET xp = xp + ? WHERE user_id = ?', amount, user_id)
-
-async def update_level(user_id, level):
-    await db_manager.execute('UPDATE users SET level = ? WHERE user_id = ?', level, user_id)
-
-async def get_logging_settings(guild_id):
-    return await db_manager.fetchone('SELECT * FROM logging_settings WHERE guild_id = ?', guild_id)
-
-async def set_logging_channel(guild_id, log_type, channel_id):
-    valid_types = ['msg_log_id', 'role_log_id', 'server_log_id', 'room_log_id', 'voice_log_id', 'mod_log_id']
-    if log_type not in valid_types: return False
-    
-    if db_manager.is_pg:
-        query = f'INSERT INTO logging_settings (guild_id, {log_type}) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET {log_type} = EXCLUDED.{log_type}'
-    else:
-        query = f'INSERT INTO logging_settings (guild_id, {log_type}) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET {log_type} = EXCLUDED.{log_type}'
-    await db_manager.execute(query, guild_id, channel_id)
-    return True
-
-async def add_warning(guild_id, user_id, moderator_id, reason):
-    await db_manager.execute('''
-        INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp)
-        VALUES (?, ?, ?, ?, ?)
-    ''', guild_id, user_id, moderator_id, reason, discord.utils.utcnow().isoformat())
-
-async def get_warnings(guild_id, user_id):
-    return await db_manager.fetchall('SELECT * FROM warnings WHERE guild_id = ? AND user_id = ?', guild_id, user_id)
-
-async def clear_warnings(guild_id, user_id):
-    await db_manager.execute('DELETE FROM warnings WHERE guild_id = ? AND user_id = ?', guild_id, user_id)
-
-async def add_alias(guild_id, alias, command_name):
-    if db_manager.is_pg:
-        query = 'INSERT INTO command_aliases (guild_id, alias, command_name) VALUES (?, ?, ?) ON CONFLICT(guild_id, alias) DO UPDATE SET command_name = EXCLUDED.command_name'
-    else:
-        query = 'INSERT OR REPLACE INTO command_aliases (guild_id, alias, command_name) VALUES (?, ?, ?)'
-    await db_manager.execute(query, guild_id, alias, command_name)
-
-async def remove_alias(guild_id, alias):
-    await db_manager.execute('DELETE FROM command_aliases WHERE guild_id = ? AND alias = ?', guild_id, alias)
-
-async def get_aliases(guild_id):
-    return await db_manager.fetchall('SELECT * FROM command_aliases WHERE guild_id = ?', guild_id)
+import aiosqlite
+import asyncpg
+import asyncio
+import contextvars
+import datetime
+import os
+import sys
+import time
+import discord
+from contextlib import asynccontextmanager
+from functools import lru_cache, wraps
+from dotenv import load_dotenv
+from metrics import Histogram
+
+load_dotenv()
+
+DB_PATH = 'bot_database.db'
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+# إعدادات SQLite للاتصال الدائم (WAL يسمح بالقراءة أثناء الكتابة)
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-16000', # ~16MB
+    'PRAGMA mmap_size=268435456', # 256MB
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000',
+]
+
+# asyncpg يحضّر (prepare) كل استعلام مرة واحدة لكل اتصال ويعيد استخدامه من هذا الكاش
+PG_STATEMENT_CACHE_SIZE = int(os.getenv('PG_STATEMENT_CACHE_SIZE', 256))
+PG_QUERY_CACHE_SIZE = 512
+# قياس زمن كل استعلام (0 لتعطيله)، وما يتجاوز SLOW_QUERY_MS يُطبع مع الجهة التي طلبته
+DB_PROFILING = os.getenv('DB_PROFILING', '1') != '0'
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+LEADERBOARD_CACHE_SIZE = 100 # عدد المتصدرين المحفوظين في الذاكرة لكل سيرفر
+
+async def get_connection():
+    await db_manager.connect()
+    return db_manager.pool if db_manager.is_pg else db_manager.conn
+
+async def execute(query, *args):
+    await db_manager.execute(query, *args)
+
+@lru_cache(maxsize=PG_QUERY_CACHE_SIZE)
+def _pg_placeholders(query):
+    # Convert ? to $1, $2, etc. (مرة واحدة لكل نص استعلام)
+    parts = query.split('?')
+    converted = [parts[0]]
+    for i, part in enumerate(parts[1:], 1):
+        converted.append(f'${i}')
+        converted.append(part)
+    return ''.join(converted)
+
+# --- Query profiler ---
+
+@lru_cache(maxsize=PG_QUERY_CACHE_SIZE)
+def _normalize_query(query):
+    return ' '.join(query.split())
+
+# من طلب التحميل المشترك (coalesce): الـ task لا يعرف من أنشأه، فيُحفظ المصدر قبل إنشائه
+_load_origin = contextvars.ContextVar('load_origin', default=None)
+# لحظة بدء الاستعلام نفسه، بعد انتظار الاتصال أو قفل الكتابة أو اتصال من الـ pool
+_statement_start = contextvars.ContextVar('statement_start', default=None)
+
+def _mark_started():
+    if DB_PROFILING:
+        _statement_start.set(time.perf_counter())
+
+# أسفل كل task: ما تحته من frames هو الـ event loop وليس من طلب الاستعلام
+_LOOP_RUNNER = asyncio.events.Handle._run.__code__
+
+def _caller(depth=2):
+    # أول frame خارج هذا الملف (الإضافة التي طلبت الاستعلام) وآخر دالة مساعدة مرت بها
+    helper = location = None
+    frame = sys._getframe(depth)
+    while frame is not None and frame.f_code is not _LOOP_RUNNER:
+        filename = frame.f_code.co_filename
+        if filename == __file__:
+            helper = frame.f_code.co_name
+        elif 'asyncio' not in filename and 'contextlib' not in filename:
+            location = f"{os.path.relpath(filename)}:{frame.f_lineno} ({frame.f_code.co_name})"
+            break
+        frame = frame.f_back
+    parts = [part for part in (helper, location, _load_origin.get()) if part]
+    return ' <- '.join(parts) or 'unknown'
+
+class QueryStats:
+    __slots__ = ('latency', 'wait', 'rows', 'errors')
+
+    def __init__(self):
+        self.latency = Histogram()
+        # انتظار القفل أو الاتصال قبل الاستعلام، منفصل حتى لا يبدو استعلام سريع بطيئاً
+        self.wait = Histogram()
+        self.rows = 0
+        self.errors = 0
+
+class QueryProfiler:
+    def __init__(self):
+        self.stats = {} # نص الاستعلام بعد توحيد المسافات -> QueryStats
+        self.slow_queries = 0
+
+    def record(self, query, seconds, rows, failed=False, wait=0.0):
+        key = _normalize_query(query)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = QueryStats()
+        stats.latency.observe(seconds)
+        stats.wait.observe(wait)
+        stats.rows += rows
+        if failed:
+            stats.errors += 1
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            self.slow_queries += 1
+            print(f"Slow query ({seconds * 1000:.1f}ms + {wait * 1000:.1f}ms wait, {rows} rows) from {_caller()}: {key[:200]}")
+
+    def top(self, limit=10):
+        return sorted(self.stats.items(), key=lambda item: item[1].latency.total, reverse=True)[:limit]
+
+    def reset(self):
+        self.stats.clear()
+        self.slow_queries = 0
+
+query_profiler = QueryProfiler()
+
+def _profiled(method):
+    if not DB_PROFILING:
+        return method
+
+    def record(query, start, token, rows, failed=False):
+        end = time.perf_counter()
+        # الدالة تحدد بداية الاستعلام بعد أخذ القفل أو الاتصال (_mark_started)، وما قبلها انتظار
+        started = _statement_start.get() or start
+        _statement_start.reset(token)
+        query_profiler.record(query, end - started, rows, failed, wait=started - start)
+
+    @wraps(method)
+    async def wrapper(self, query, *args):
+        token = _statement_start.set(None)
+        start = time.perf_counter()
+        try:
+            result = await method(self, query, *args)
+        except Exception:
+            record(query, start, token, 0, failed=True)
+            raise
+        if isinstance(result, list):
+            rows = len(result)
+        else:
+            rows = 0 if result is None else 1
+        record(query, start, token, rows)
+        return result
+    return wrapper
+
+# --- Refactoring to a cleaner structure ---
+
+class Transaction:
+    # استعلامات على اتصال واحد داخل معاملة مفتوحة (انظر Database.transaction)
+    def __init__(self, db, conn):
+        self.db = db
+        self.conn = conn
+
+    @_profiled
+    async def execute(self, query, *args):
+        query = self.db._convert_query(query)
+        if self.db.is_pg:
+            await self.conn.execute(query, *args)
+        else:
+            await self.conn.execute(query, args)
+
+    @_profiled
+    async def fetchone(self, query, *args):
+        query = self.db._convert_query(query)
+        if self.db.is_pg:
+            row = await self.conn.fetchrow(query, *args)
+        else:
+            async with self.conn.execute(query, args) as cursor:
+                row = await cursor.fetchone()
+        return dict(row) if row else None
+
+class Database:
+    def __init__(self):
+        self.is_pg = DATABASE_URL is not None
+        self.pool = None
+        # اتصال SQLite واحد يعيش طوال عمر البوت بدل فتح اتصال (وثريد) لكل استعلام
+        self.conn = None
+        self._connect_lock = asyncio.Lock()
+        # الاتصال مشترك، فلا نسمح لعمليتي كتابة بالتداخل قبل الـ commit
+        self._write_lock = asyncio.Lock()
+
+    async def connect(self):
+        if self.pool or self.conn:
+            return
+        async with self._connect_lock:
+            if self.is_pg and not self.pool:
+                self.pool = await asyncpg.create_pool(DATABASE_URL, statement_cache_size=PG_STATEMENT_CACHE_SIZE)
+            elif not self.is_pg and not self.conn:
+                conn = await aiosqlite.connect(DB_PATH)
+                conn.row_factory = aiosqlite.Row
+                for pragma in SQLITE_PRAGMAS:
+                    await conn.execute(pragma)
+                self.conn = conn
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        if self.conn:
+            await self.conn.close()
+            self.conn = None
+
+    def _convert_query(self, query):
+        if not self.is_pg:
+            return query
+        return _pg_placeholders(query)
+
+    @_profiled
+    async def execute(self, query, *args):
+        await self.connect()
+        query = self._convert_query(query)
+        if self.is_pg:
+            async with self.pool.acquire() as conn:
+                _mark_started()
+                await conn.execute(query, *args)
+        else:
+            async with self._write_lock:
+                _mark_started()
+                await self.conn.execute(query, args)
+                await self.conn.commit()
+
+    @_profiled
+    async def executemany(self, query, args_list):
+        # كل الصفوف تُكتب في معاملة واحدة (commit واحد)
+        await self.connect()
+        query = self._convert_query(query)
+        if self.is_pg:
+            async with self.pool.acquire() as conn:
+                _mark_started()
+                async with conn.transaction():
+                    await conn.executemany(query, args_list)
+        else:
+            async with self._write_lock:
+                _mark_started()
+                await self.conn.executemany(query, args_list)
+                await self.conn.commit()
+
+    @_profiled
+    async def execute_returning(self, query, *args):
+        # كتابة مع RETURNING: ترجع الصف الناتج بعد الـ commit
+        await self.connect()
+        query = self._convert_query(query)
+        if self.is_pg:
+            async with self.pool.acquire() as conn:
+                _mark_started()
+                row = await conn.fetchrow(query, *args)
+                return dict(row) if row else None
+        else:
+            async with self._write_lock:
+                _mark_started()
+                async with self.conn.execute(query, args) as cursor:
+                    row = await cursor.fetchone()
+                await self.conn.commit()
+                return dict(row) if row else None
+
+    @asynccontextmanager
+    async def transaction(self):
+        # كل ما يُنفذ داخل الـ block يُحفظ معاً أو يُلغى معاً عند حدوث خطأ
+        await self.connect()
+        if self.is_pg:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    yield Transaction(self, conn)
+        else:
+            async with self._write_lock:
+                try:
+                    yield Transaction(self, self.conn)
+                except BaseException:
+                    await self.conn.rollback()
+                    raise
+                await self.conn.commit()
+
+    @_profiled
+    async def fetchone(self, query, *args):
+        await self.connect()
+        query = self._convert_query(query)
+        if self.is_pg:
+            async with self.pool.acquire() as conn:
+                _mark_started()
+                row = await conn.fetchrow(query, *args)
+                return dict(row) if row else None
+        else:
+            _mark_started()
+            async with self.conn.execute(query, args) as cursor:
+                row = await cursor.fetchone()
+                return dict(row) if row else None
+
+    @_profiled
+    async def fetchall(self, query, *args):
+        await self.connect()
+        query = self._convert_query(query)
+        if self.is_pg:
+            async with self.pool.acquire() as conn:
+                _mark_started()
+                rows = await conn.fetch(query, *args)
+                return [dict(r) for r in rows]
+        else:
+            _mark_started()
+            async with self.conn.execute(query, args) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(r) for r in rows]
+
+db_manager = Database()
+
+# --- Write-behind buffer for counters (credits, xp, level) ---
+
+COUNTER_FLUSH_INTERVAL = 2.0 # ثواني
+COUNTER_FLUSH_SIZE = 500 # عدد المستخدمين قبل الكتابة الفورية
+
+class CounterBuffer:
+    def __init__(self, db):
+        self.db = db
+        # user_id -> [credits_delta, xp_delta, level or None]
+        self.pending = {}
+        # الدفعة التي تُكتب الآن: لم تعد في pending ولم تصل لقاعدة البيانات بعد
+        self.inflight = {}
+        # يمنع القراءة أثناء كتابة الدفعة حتى لا تُحسب التغييرات مرتين
+        self.lock = asyncio.Lock()
+        self._flush_task = None
+
+    def _entry(self, user_id):
+        entry = self.pending.get(user_id)
+        if entry is None:
+            entry = self.pending[user_id] = [0, 0, None]
+        return entry
+
+    def has(self, user_id):
+        # من في دفعة جارية يحتاج القفل أيضاً، وإلا قُرئ صفه القديم قبل اكتمال الكتابة
+        return user_id in self.pending or user_id in self.inflight
+
+    async def add(self, user_id, credits=0, xp=0, level=None):
+        entry = self._entry(user_id)
+        entry[0] += credits
+        entry[1] += xp
+        if level is not None:
+            entry[2] = level
+
+        if len(self.pending) >= COUNTER_FLUSH_SIZE:
+            await self.flush()
+        else:
+            self._schedule()
+
+    def _schedule(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(COUNTER_FLUSH_INTERVAL)
+        # المهمة لم تعد مجدولة، حتى تنشئ إعادة الجدولة بعد الفشل مهمة جديدة
+        self._flush_task = None
+        try:
+            # shield: إلغاء المهمة (close مثلاً) أثناء الكتابة لا يقطع الدفعة في منتصفها
+            await asyncio.shield(self.flush())
+        except Exception as e:
+            print(f"Counter flush failed: {e}")
+
+    async def flush(self):
+        async with self.lock:
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, {}
+            self.inflight = batch
+            rows = [(c, x, lvl, uid) for uid, (c, x, lvl) in batch.items()]
+            try:
+                await self.db.executemany(
+                    'UPDATE users SET credits = credits + ?, xp = xp + ?, level = COALESCE(?, level) WHERE user_id = ?',
+                    rows
+                )
+            except BaseException as e:
+                # إرجاع التغييرات للمخزن لإعادة المحاولة لاحقاً (القيم الأحدث للمستوى تبقى)، حتى عند الإلغاء
+                for uid, (c, x, lvl) in batch.items():
+                    entry = self._entry(uid)
+                    entry[0] += c
+                    entry[1] += x
+                    if entry[2] is None:
+                        entry[2] = lvl
+                if isinstance(e, Exception):
+                    self._schedule()
+                raise
+            finally:
+                self.inflight = {}
+
+    def overlay(self, row):
+        # قراءة ما كُتب: إضافة التغييرات التي لم تُحفظ بعد
+        if row is None:
+            return row
+        entry = self.pending.get(row['user_id'])
+        if entry:
+            row['credits'] += entry[0]
+            row['xp'] += entry[1]
+            if entry[2] is not None:
+                row['level'] = entry[2]
+        return row
+
+    async def close(self):
+        # إلغاء الانتظار فقط: الكتابة الجارية محمية بـ shield، وflush هنا ينتظرها عبر القفل ثم يكتب الباقي
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        await self.flush()
+
+counter_buffer = CounterBuffer(db_manager)
+
+# --- Settings cache (logging / ticket / guild settings) ---
+
+SETTINGS_CACHE_TTL = 300 # ثواني
+
+# يميز "غير موجود في الكاش" عن صف غير موجود في قاعدة البيانات (None)
+_MISSING = object()
+
+class SettingsCache:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        # (table, guild_id) -> (expires_at, row)
+        self._data = {}
+        # يزيد مع كل invalidate حتى لا تُحفظ قراءة قديمة بدأت قبل التعديل
+        self._versions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, table, guild_id):
+        key = (table, guild_id)
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            self._data.pop(key, None)
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        return item[1]
+
+    def version(self, table, guild_id):
+        return self._versions.get((table, guild_id), 0)
+
+    def set(self, table, guild_id, row, version):
+        key = (table, guild_id)
+        if self._versions.get(key, 0) == version:
+            self._data[key] = (time.monotonic() + self.ttl, row)
+
+    def invalidate(self, table, guild_id):
+        key = (table, guild_id)
+        self._data.pop(key, None)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+settings_cache = SettingsCache(SETTINGS_CACHE_TTL)
+
+def coalesce(loads, key, load):
+    # كل من يطلب نفس المفتاح أثناء التحميل ينتظر نفس الاستعلام، بدل استعلام لكل رسالة عندما يكون الكاش فارغاً
+    # (shield: إلغاء أحد المنتظرين لا يلغي التحميل على الباقين)
+    task = loads.get(key)
+    if task is None:
+        # الـ task ينسخ الـ context عند إنشائه، فيرى الاستعلام البطيء داخله من طلب التحميل
+        token = _load_origin.set(_caller(1)) if DB_PROFILING else None
+        try:
+            task = loads[key] = asyncio.ensure_future(load())
+        finally:
+            if token is not None:
+                _load_origin.reset(token)
+        task.add_done_callback(lambda _: loads.pop(key, None))
+    return asyncio.shield(task)
+
+# (table, guild_id, version) -> Task، والـ version حتى لا ينتظر أحد قراءة بدأت قبل تعديل الإعدادات
+_settings_loads = {}
+
+async def _load_settings(table, guild_id, version):
+    row = await db_manager.fetchone(f'SELECT * FROM {table} WHERE guild_id = ?', guild_id)
+    settings_cache.set(table, guild_id, row, version)
+    return row
+
+async def _get_settings(table, guild_id):
+    row = settings_cache.get(table, guild_id)
+    if row is _MISSING:
+        version = settings_cache.version(table, guild_id)
+        row = await coalesce(_settings_loads, (table, guild_id, version), lambda: _load_settings(table, guild_id, version))
+    return row
+
+async def init_db():
+    # Initial tables setup
+    queries = [
+        '''CREATE TABLE IF NOT EXISTS users (
+            user_id BIGINT PRIMARY KEY,
+            credits INTEGER DEFAULT 0,
+            xp INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 0,
+            last_daily TEXT,
+            rep INTEGER DEFAULT 0
+        )''',
+        '''CREATE TABLE IF NOT EXISTS ticket_settings (
+            guild_id BIGINT PRIMARY KEY,
+            category_id BIGINT,
+            logs_channel_id BIGINT,
+            staff_role_id BIGINT,
+            staff_app_role_id BIGINT,
+            inquiry_role_id BIGINT,
+            complaint_role_id BIGINT,
+            girl_verif_role_id BIGINT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id BIGINT PRIMARY KEY,
+            leveling_channel_id BIGINT,
+            ticket_counter INTEGER DEFAULT 0,
+            block_links INTEGER DEFAULT 1,
+            anti_spam INTEGER DEFAULT 1,
+            anti_raid INTEGER DEFAULT 1
+        )''',
+        '''CREATE TABLE IF NOT EXISTS logging_settings (
+            guild_id BIGINT PRIMARY KEY,
+            msg_log_id BIGINT,
+            role_log_id BIGINT,
+            server_log_id BIGINT,
+            room_log_id BIGINT,
+            voice_log_id BIGINT,
+            mod_log_id BIGINT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS warnings (
+            warn_id SERIAL PRIMARY KEY if_pg,
+            guild_id BIGINT,
+            user_id BIGINT,
+            moderator_id BIGINT,
+            reason TEXT,
+            timestamp TEXT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS command_aliases (
+            guild_id BIGINT,
+            alias TEXT,
+            command_name TEXT,
+            PRIMARY KEY (guild_id, alias)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS broadcast_jobs (
+            job_id SERIAL PRIMARY KEY if_pg,
+            guild_id BIGINT,
+            channel_id BIGINT,
+            progress_message_id BIGINT,
+            author_name TEXT,
+            message TEXT,
+            last_user_id BIGINT DEFAULT 0,
+            success INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'running',
+            created_at TEXT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS tickets (
+            channel_id BIGINT PRIMARY KEY,
+            guild_id BIGINT,
+            user_id BIGINT,
+            ticket_type TEXT,
+            opened_at TEXT
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_tickets_guild_user ON tickets (guild_id, user_id)',
+        '''CREATE TABLE IF NOT EXISTS automod_rules (
+            guild_id BIGINT,
+            rule_type TEXT,
+            term TEXT,
+            PRIMARY KEY (guild_id, rule_type, term)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS member_xp (
+            guild_id BIGINT,
+            user_id BIGINT,
+            xp INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_member_xp_rank ON member_xp (guild_id, xp DESC)',
+        '''CREATE TABLE IF NOT EXISTS lockdown_channels (
+            guild_id BIGINT,
+            channel_id BIGINT,
+            previous INTEGER,
+            ends_at TEXT,
+            PRIMARY KEY (guild_id, channel_id)
+        )'''
+    ]
+    
+    # Simple fix for SERIAL vs AUTOINCREMENT
+    for q in queries:
+        if db_manager.is_pg:
+            q = q.replace('SERIAL PRIMARY KEY if_pg', 'SERIAL PRIMARY KEY')
+            q = q.replace('INTEGER PRIMARY KEY AUTOINCREMENT', 'SERIAL PRIMARY KEY')
+        else:
+            q = q.replace('SERIAL PRIMARY KEY if_pg', 'INTEGER PRIMARY KEY AUTOINCREMENT')
+            q = q.replace('BIGINT', 'INTEGER') # SQLite works with INTEGER for IDs
+        await db_manager.execute(q)
+
+    # Migrations for SQLite (PG usually starts fresh or handles this via external tools, but we can add basic check)
+    if not db_manager.is_pg:
+        # Check logging_settings
+        columns = [column['name'] for column in await db_manager.fetchall("PRAGMA table_info(logging_settings)")]
+        if 'voice_log_id' not in columns:
+            await db_manager.execute('ALTER TABLE logging_settings ADD COLUMN voice_log_id INTEGER')
+
+        # Check ticket_settings
+        columns = [column['name'] for column in await db_manager.fetchall("PRAGMA table_info(ticket_settings)")]
+        to_add = {
+            'staff_app_role_id': 'INTEGER',
+            'inquiry_role_id': 'INTEGER',
+            'complaint_role_id': 'INTEGER',
+            'girl_verif_role_id': 'INTEGER'
+        }
+        for col, type in to_add.items():
+            if col not in columns:
+                await db_manager.execute(f'ALTER TABLE ticket_settings ADD COLUMN {col} {type}')
+
+        # Check guild_settings
+        columns = [column['name'] for column in await db_manager.fetchall("PRAGMA table_info(guild_settings)")]
+        for col in ('block_links', 'anti_spam', 'anti_raid'):
+            if col not in columns:
+                await db_manager.execute(f'ALTER TABLE guild_settings ADD COLUMN {col} INTEGER DEFAULT 1')
+    else:
+        for col in ('block_links', 'anti_spam', 'anti_raid'):
+            await db_manager.execute(f'ALTER TABLE guild_settings ADD COLUMN IF NOT EXISTS {col} INTEGER DEFAULT 1')
+
+async def close_db():
+    await counter_buffer.close()
+    await db_manager.close()
+
+# Helper functions mapped to the new db_manager
+async def get_ticket_settings(guild_id):
+    return await _get_settings('ticket_settings', guild_id)
+
+async def set_ticket_settings(guild_id, category_id, logs_channel_id, staff_role_id, staff_app_role_id, inquiry_role_id=None, complaint_role_id=None, girl_verif_role_id=None):
+    if db_manager.is_pg:
+        query = '''INSERT INTO ticket_settings (guild_id, category_id, logs_channel_id, staff_role_id, staff_app_role_id, inquiry_role_id, complaint_role_id, girl_verif_role_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(guild_id) DO UPDATE SET 
+                   category_id=EXCLUDED.category_id, logs_channel_id=EXCLUDED.logs_channel_id, 
+                   staff_role_id=EXCLUDED.staff_role_id, staff_app_role_id=EXCLUDED.staff_app_role_id,
+                   inquiry_role_id=EXCLUDED.inquiry_role_id, complaint_role_id=EXCLUDED.complaint_role_id,
+                   girl_verif_role_id=EXCLUDED.girl_verif_role_id'''
+    else:
+        query = 'INSERT OR REPLACE INTO ticket_settings (guild_id, category_id, logs_channel_id, staff_role_id, staff_app_role_id, inquiry_role_id, complaint_role_id, girl_verif_role_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+    await db_manager.execute(query, guild_id, category_id, logs_channel_id, staff_role_id, staff_app_role_id, inquiry_role_id, complaint_role_id, girl_verif_role_id)
+    settings_cache.invalidate('ticket_settings', guild_id)
+
+async def get_guild_settings(guild_id):
+    return await _get_settings('guild_settings', guild_id)
+
+async def set_leveling_channel(guild_id, channel_id):
+    if db_manager.is_pg:
+        query = 'INSERT INTO guild_settings (guild_id, leveling_channel_id) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET leveling_channel_id = EXCLUDED.leveling_channel_id'
+    else:
+        query = 'INSERT INTO guild_settings (guild_id, leveling_channel_id) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET leveling_channel_id = EXCLUDED.leveling_channel_id'
+    await db_manager.execute(query, guild_id, channel_id)
+    settings_cache.invalidate('guild_settings', guild_id)
+
+async def get_and_increment_ticket_count(guild_id):
+    # زيادة ذرية في استعلام واحد: لا يحصل طلبان متزامنان على نفس الرقم
+    row = await db_manager.execute_returning(
+        'INSERT INTO guild_settings (guild_id, ticket_counter) VALUES (?, 1) '
+        'ON CONFLICT(guild_id) DO UPDATE SET ticket_counter = COALESCE(guild_settings.ticket_counter, 0) + 1 '
+        'RETURNING ticket_counter',
+        guild_id
+    )
+    settings_cache.invalidate('guild_settings', guild_id)
+    return row['ticket_counter']
+
+# guild_id -> {user_id: {ticket_type: channel_id}} نسخة في الذاكرة من جدول tickets
+_open_tickets = {}
+# channel_id -> (guild_id, user_id, ticket_type)
+_ticket_channels = {}
+_open_ticket_loads = {} # guild_id -> Task
+# guild_id -> عدد التذاكر التي فُتحت أثناء تحميل الفهرس، حتى لا يُحفظ فهرس قُرئ قبلها
+_open_ticket_writes = {}
+
+async def _load_open_tickets(guild_id):
+    while True:
+        writes = _open_ticket_writes.get(guild_id, 0)
+        rows = await db_manager.fetchall('SELECT channel_id, user_id, ticket_type FROM tickets WHERE guild_id = ?', guild_id)
+        if _open_ticket_writes.get(guild_id, 0) == writes:
+            break
+    tickets = _open_tickets[guild_id] = {}
+    for row in rows:
+        tickets.setdefault(row['user_id'], {})[row['ticket_type']] = row['channel_id']
+        _ticket_channels[row['channel_id']] = (guild_id, row['user_id'], row['ticket_type'])
+    return tickets
+
+async def get_open_tickets(guild_id):
+    tickets = _open_tickets.get(guild_id)
+    if tickets is None:
+        # تحميل واحد للسيرفر: تحميلان متوازيان قد يكتب الأقدم منهما فوق تذكرة فُتحت للتو
+        tickets = await coalesce(_open_ticket_loads, guild_id, lambda: _load_open_tickets(guild_id))
+    return tickets
+
+async def add_open_ticket(guild_id, user_id, ticket_type, channel_id):
+    await db_manager.execute(
+        'INSERT INTO tickets (channel_id, guild_id, user_id, ticket_type, opened_at) VALUES (?, ?, ?, ?, ?)',
+        channel_id, guild_id, user_id, ticket_type, discord.utils.utcnow().isoformat()
+    )
+    tickets = _open_tickets.get(guild_id)
+    if tickets is not None:
+        tickets.setdefault(user_id, {})[ticket_type] = channel_id
+        _ticket_channels[channel_id] = (guild_id, user_id, ticket_type)
+    elif guild_id in _open_ticket_loads:
+        _open_ticket_writes[guild_id] = _open_ticket_writes.get(guild_id, 0) + 1
+
+def is_open_ticket(channel_id):
+    return channel_id in _ticket_channels
+
+async def remove_open_ticket(channel_id):
+    await db_manager.execute('DELETE FROM tickets WHERE channel_id = ?', channel_id)
+    item = _ticket_channels.pop(channel_id, None)
+    if item:
+        guild_id, user_id, ticket_type = item
+        user_tickets = _open_tickets.get(guild_id, {}).get(user_id)
+        if user_tickets is not None:
+            user_tickets.pop(ticket_type, None)
+            if not user_tickets:
+                del _open_tickets[guild_id][user_id]
+
+async def get_user(user_id):
+    if not counter_buffer.has(user_id):
+        return await db_manager.fetchone('SELECT * FROM users WHERE user_id = ?', user_id)
+    async with counter_buffer.lock:
+        row = await db_manager.fetchone('SELECT * FROM users WHERE user_id = ?', user_id)
+        return counter_buffer.overlay(row)
+
+async def create_user(user_id):
+    if db_manager.is_pg:
+        await db_manager.execute('INSERT INTO users (user_id) VALUES (?) ON CONFLICT DO NOTHING', user_id)
+    else:
+        await db_manager.execute('INSERT OR IGNORE INTO users (user_id) VALUES (?)', user_id)
+
+async def update_credits(user_id, amount):
+    await counter_buffer.add(user_id, credits=amount)
+
+# user_id -> [asyncio.Lock, عدد المستخدمين له]، يُحذف عندما لا يحتاجه أحد
+_user_locks = {}
+
+@asynccontextmanager
+async def user_lock(*user_ids):
+    # قفل لكل مستخدم بدل قفل عام، وتؤخذ بترتيب ثابت حتى لا يتعطل تحويلان متعاكسان
+    entries = []
+    for user_id in sorted(set(user_ids)):
+        entry = _user_locks.get(user_id)
+        if entry is None:
+            entry = _user_locks[user_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        entries.append((user_id, entry))
+    acquired = []
+    try:
+        for user_id, entry in entries:
+            await entry[0].acquire()
+            acquired.append(entry[0])
+        yield
+    finally:
+        for lock in acquired:
+            lock.release()
+        for user_id, entry in entries:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _user_locks[user_id]
+
+async def transfer_credits(sender_id, receiver_id, amount):
+    # ترجع (رصيد المرسل، رصيد المستقبل) بعد التحويل، أو None إذا لم يكفِ الرصيد
+    async with user_lock(sender_id, receiver_id):
+        if counter_buffer.has(sender_id) or counter_buffer.has(receiver_id):
+            await counter_buffer.flush()
+        async with db_manager.transaction() as tx:
+            sender = await tx.fetchone(
+                'UPDATE users SET credits = credits - ? WHERE user_id = ? AND credits >= ? RETURNING credits',
+                amount, sender_id, amount
+            )
+            if sender is None:
+                return None
+            receiver = await tx.fetchone(
+                'INSERT INTO users (user_id, credits) VALUES (?, ?) '
+                'ON CONFLICT(user_id) DO UPDATE SET credits = users.credits + EXCLUDED.credits RETURNING credits',
+                receiver_id, amount
+            )
+    return sender['credits'], receiver['credits']
+
+async def set_last_daily(user_id, date_str):
+    await db_manager.execute('UPDATE users SET last_daily = ? WHERE user_id = ?', date_str, user_id)
+
+async def claim_daily(user_id, amount, cooldown=86400):
+    # يرجع (True, الرصيد الجديد) أو (False, الثواني المتبقية) إذا استلمها خلال آخر cooldown ثانية
+    # الفحص والتسجيل في استعلام واحد، فيبقى صحيحاً بعد إعادة التشغيل ومع أكثر من نسخة للبوت
+    if counter_buffer.has(user_id):
+        await counter_buffer.flush()
+    now = discord.utils.utcnow()
+    cutoff = now - datetime.timedelta(seconds=cooldown)
+    row = await db_manager.execute_returning('''
+        INSERT INTO users (user_id, credits, last_daily) VALUES (?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET credits = users.credits + EXCLUDED.credits, last_daily = EXCLUDED.last_daily
+        WHERE users.last_daily IS NULL OR users.last_daily <= ?
+        RETURNING credits
+    ''', user_id, amount, now.isoformat(timespec='seconds'), cutoff.isoformat(timespec='seconds'))
+    if row:
+        return True, row['credits']
+    row = await db_manager.fetchone('SELECT last_daily FROM users WHERE user_id = ?', user_id)
+    last_daily = datetime.datetime.fromisoformat(row['last_daily'])
+    return False, max(1, int(cooldown - (now - last_daily).total_seconds()))
+
+async def add_xp(user_id, amount):
+    await counter_buffer.add(user_id, xp=amount)
+
+async def update_level(user_id, level):
+    await counter_buffer.add(user_id, level=level)
+
+# guild_id -> [{'user_id', 'xp', 'level'}, ...] أعلى LEADERBOARD_CACHE_SIZE مرتبين، تُحدَّث مع كل إضافة XP
+_leaderboards = {}
+
+async def award_xp(guild_id, user_id, amount):
+    # إنشاء العضو وإضافة الـ XP وحساب المستوى الجديد في استعلام واحد
+    row = await db_manager.execute_returning('''
+        INSERT INTO member_xp (guild_id, user_id, xp, level) VALUES (?, ?, ?, CASE WHEN ? >= 100 THEN 1 ELSE 0 END)
+        ON CONFLICT(guild_id, user_id) DO UPDATE SET
+            xp = member_xp.xp + EXCLUDED.xp,
+            level = CASE WHEN member_xp.xp + EXCLUDED.xp >= (member_xp.level + 1) * 100 THEN member_xp.level + 1 ELSE member_xp.level END
+        RETURNING user_id, xp, level
+    ''', guild_id, user_id, amount, amount)
+    _update_leaderboard(guild_id, row)
+    # المستوى يرتفع درجة واحدة عند تجاوز level * 100، فهذه الإضافة هي التي تجاوزته
+    row['leveled_up'] = row['level'] > 0 and row['xp'] - amount < row['level'] * 100 <= row['xp']
+    return row
+
+def _update_leaderboard(guild_id, row):
+    board = _leaderboards.get(guild_id)
+    if board is None:
+        return
+    entry = {'user_id': row['user_id'], 'xp': row['xp'], 'level': row['level']}
+    for i, item in enumerate(board):
+        if item['user_id'] == entry['user_id']:
+            del board[i]
+            break
+    else:
+        # الـ XP لا ينقص، فمن هو خارج القائمة يدخلها فقط إذا تجاوز آخر واحد فيها
+        if len(board) >= LEADERBOARD_CACHE_SIZE and entry['xp'] <= board[-1]['xp']:
+            return
+    i = len(board)
+    while i > 0 and board[i - 1]['xp'] < entry['xp']:
+        i -= 1
+    board.insert(i, entry)
+    del board[LEADERBOARD_CACHE_SIZE:]
+
+async def get_leaderboard(guild_id):
+    board = _leaderboards.get(guild_id)
+    if board is None:
+        rows = await db_manager.fetchall(
+            'SELECT user_id, xp, level FROM member_xp WHERE guild_id = ? ORDER BY xp DESC LIMIT ?',
+            guild_id, LEADERBOARD_CACHE_SIZE
+        )
+        board = _leaderboards[guild_id] = rows
+    return board
+
+async def get_member_xp(guild_id, user_id):
+    return await db_manager.fetchone('SELECT * FROM member_xp WHERE guild_id = ? AND user_id = ?', guild_id, user_id)
+
+async def get_rank(guild_id, xp):
+    # من في القائمة المحفوظة يُحسب ترتيبه منها، والباقي بعدّ من فوقه على الـ index
+    # التكلفة O(الترتيب): العدّ يمر على كل مدخلات الـ index الأعلى منه (بدون قراءة الجدول)، أي O(n) لآخر السيرفر
+    board = await get_leaderboard(guild_id)
+    if len(board) < LEADERBOARD_CACHE_SIZE or xp >= board[-1]['xp']:
+        return 1 + sum(1 for item in board if item['xp'] > xp)
+    row = await db_manager.fetchone('SELECT COUNT(*) AS higher FROM member_xp WHERE guild_id = ? AND xp > ?', guild_id, xp)
+    return row['higher'] + 1
+
+async def get_logging_settings(guild_id):
+    return await _get_settings('logging_settings', guild_id)
+
+async def set_logging_channel(guild_id, log_type, channel_id):
+    valid_types = ['msg_log_id', 'role_log_id', 'server_log_id', 'room_log_id', 'voice_log_id', 'mod_log_id']
+    if log_type not in valid_types: return False
+    
+    if db_manager.is_pg:
+        query = f'INSERT INTO logging_settings (guild_id, {log_type}) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET {log_type} = EXCLUDED.{log_type}'
+    else:
+        query = f'INSERT INTO logging_settings (guild_id, {log_type}) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET {log_type} = EXCLUDED.{log_type}'
+    await db_manager.execute(query, guild_id, channel_id)
+    settings_cache.invalidate('logging_settings', guild_id)
+    return True
+
+async def add_warning(guild_id, user_id, moderator_id, reason):
+    await db_manager.execute('''
+        INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+    ''', guild_id, user_id, moderator_id, reason, discord.utils.utcnow().isoformat())
+
+async def get_warnings(guild_id, user_id):
+    return await db_manager.fetchall('SELECT * FROM warnings WHERE guild_id = ? AND user_id = ?', guild_id, user_id)
+
+async def clear_warnings(guild_id, user_id):
+    await db_manager.execute('DELETE FROM warnings WHERE guild_id = ? AND user_id = ?', guild_id, user_id)
+
+# guild_id -> {alias: command_name}، يُحمّل مرة واحدة لكل سيرفر
+_alias_cache = {}
+_alias_loads = {} # (guild_id, version) -> Task
+# guild_id -> يزيد مع كل تعديل، حتى لا يُحفظ تحميل بدأ قبل التعديل (مثل SettingsCache)
+_alias_versions = {}
+
+def _alias_changed(guild_id):
+    _alias_versions[guild_id] = _alias_versions.get(guild_id, 0) + 1
+
+async def add_alias(guild_id, alias, command_name):
+    if db_manager.is_pg:
+        query = 'INSERT INTO command_aliases (guild_id, alias, command_name) VALUES (?, ?, ?) ON CONFLICT(guild_id, alias) DO UPDATE SET command_name = EXCLUDED.command_name'
+    else:
+        query = 'INSERT OR REPLACE INTO command_aliases (guild_id, alias, command_name) VALUES (?, ?, ?)'
+    await db_manager.execute(query, guild_id, alias, command_name)
+    _alias_changed(guild_id)
+    if guild_id in _alias_cache:
+        _alias_cache[guild_id][alias] = command_name
+
+async def remove_alias(guild_id, alias):
+    await db_manager.execute('DELETE FROM command_aliases WHERE guild_id = ? AND alias = ?', guild_id, alias)
+    _alias_changed(guild_id)
+    if guild_id in _alias_cache:
+        _alias_cache[guild_id].pop(alias, None)
+
+async def get_aliases(guild_id):
+    return await db_manager.fetchall('SELECT * FROM command_aliases WHERE guild_id = ?', guild_id)
+
+async def _load_alias_map(guild_id, version):
+    rows = await get_aliases(guild_id)
+    aliases = {row['alias']: row['command_name'] for row in rows}
+    if _alias_versions.get(guild_id, 0) == version:
+        _alias_cache[guild_id] = aliases
+    return aliases
+
+async def get_alias_map(guild_id):
+    aliases = _alias_cache.get(guild_id)
+    if aliases is None:
+        version = _alias_versions.get(guild_id, 0)
+        aliases = await coalesce(_alias_loads, (guild_id, version), lambda: _load_alias_map(guild_id, version))
+    return aliases
+
+async def get_automod_rules(guild_id):
+    return await db_manager.fetchall('SELECT rule_type, term FROM automod_rules WHERE guild_id = ?', guild_id)
+
+async def add_automod_rule(guild_id, rule_type, term):
+    await db_manager.execute('INSERT INTO automod_rules (guild_id, rule_type, term) VALUES (?, ?, ?) ON CONFLICT DO NOTHING', guild_id, rule_type, term)
+
+async def remove_automod_rule(guild_id, rule_type, term):
+    await db_manager.execute('DELETE FROM automod_rules WHERE guild_id = ? AND rule_type = ? AND term = ?', guild_id, rule_type, term)
+
+async def set_block_links(guild_id, enabled):
+    query = 'INSERT INTO guild_settings (guild_id, block_links) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET block_links = EXCLUDED.block_links'
+    await db_manager.execute(query, guild_id, int(enabled))
+    settings_cache.invalidate('guild_settings', guild_id)
+
+async def set_anti_spam(guild_id, enabled):
+    query = 'INSERT INTO guild_settings (guild_id, anti_spam) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET anti_spam = EXCLUDED.anti_spam'
+    await db_manager.execute(query, guild_id, int(enabled))
+    settings_cache.invalidate('guild_settings', guild_id)
+
+async def set_anti_raid(guild_id, enabled):
+    query = 'INSERT INTO guild_settings (guild_id, anti_raid) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET anti_raid = EXCLUDED.anti_raid'
+    await db_manager.execute(query, guild_id, int(enabled))
+    settings_cache.invalidate('guild_settings', guild_id)
+
+# --- Anti-raid lockdown (حتى لا تبقى الرومات مقفلة بعد إعادة التشغيل) ---
+
+async def add_lockdown_channel(guild_id, channel_id, previous, ends_at):
+    # previous: قيمة send_messages قبل القفل (None = غير محددة)
+    await db_manager.execute(
+        'INSERT INTO lockdown_channels (guild_id, channel_id, previous, ends_at) VALUES (?, ?, ?, ?) ON CONFLICT DO NOTHING',
+        guild_id, channel_id, None if previous is None else int(previous), ends_at.isoformat()
+    )
+
+async def get_lockdown_channels():
+    rows = await db_manager.fetchall('SELECT * FROM lockdown_channels')
+    for row in rows:
+        row['previous'] = None if row['previous'] is None else bool(row['previous'])
+        row['ends_at'] = datetime.datetime.fromisoformat(row['ends_at'])
+    return rows
+
+async def clear_lockdown(guild_id):
+    await db_manager.execute('DELETE FROM lockdown_channels WHERE guild_id = ?', guild_id)
+
+async def create_broadcast_job(guild_id, channel_id, progress_message_id, author_name, message):
+    return await db_manager.execute_returning('''
+        INSERT INTO broadcast_jobs (guild_id, channel_id, progress_message_id, author_name, message, created_at)
+        VALUES (?, ?, ?, ?, ?, ?) RETURNING *
+    ''', guild_id, channel_id, progress_message_id, author_name, message, discord.utils.utcnow().isoformat())
+
+async def update_broadcast_progress(job_id, last_user_id, success, failed):
+    await db_manager.execute('UPDATE broadcast_jobs SET last_user_id = ?, success = ?, failed = ? WHERE job_id = ?', last_user_id, success, failed, job_id)
+
+async def finish_broadcast_job(job_id, status='done'):
+    await db_manager.execute('UPDATE broadcast_jobs SET status = ? WHERE job_id = ?', status, job_id)
+
+async def get_running_broadcasts():
+    return await db_manager.fetchall("SELECT * FROM broadcast_jobs WHERE status = 'running'")
@@ -0,0 +1,231 @@
+import asyncio
+import functools
+import math
+import os
+import random
+import time
+import discord
+from discord import app_commands
+from aiohttp import web
+
+# نسبة الأحداث التي تُقاس (1 = الكل، 0 = القياس معطل بالكامل ولا يُغلّف أي listener)
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 1.0))
+# منفذ صفحة Prometheus على localhost فقط، 0 = معطلة
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+LOOP_LAG_INTERVAL = 0.5 # ثواني بين كل قياس لتأخر الـ event loop
+
+# HDR-style: كل قوة للعدد 2 مقسمة إلى 16 دلو، فالخطأ النسبي أقل من ~6% لأي قيمة
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+def _bucket_index(value):
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS - 1)
+    return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+def _bucket_upper(index):
+    # أعلى قيمة في الدلو (بالميكروثانية)
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = index - (shift << SUB_BUCKET_BITS)
+    return ((mantissa + 1) << shift) - 1
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = {} # رقم الدلو -> العدد
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = _bucket_index(int(seconds * 1_000_000))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(_bucket_upper(index) / 1_000_000, self.max)
+        return self.max
+
+class Metrics:
+    def __init__(self):
+        self.histograms = {} # (kind, name) -> Histogram
+        self.errors = {} # (kind, name) -> عدد الأخطاء
+        self.loop_lag = Histogram()
+        self._wrappers = {} # (func, event) -> wrapper، لإزالة الـ listener المغلف لاحقاً
+        self._lag_task = None
+        self._runner = None
+
+    def sampled(self):
+        return METRICS_SAMPLE_RATE >= 1 or random.random() < METRICS_SAMPLE_RATE
+
+    def observe(self, kind, name, seconds):
+        histogram = self.histograms.get((kind, name))
+        if histogram is None:
+            histogram = self.histograms[(kind, name)] = Histogram()
+        histogram.observe(seconds)
+
+    def error(self, kind, name):
+        self.errors[(kind, name)] = self.errors.get((kind, name), 0) + 1
+
+    def timer(self, kind, name):
+        return _Timer(self, kind, name)
+
+    # --- Listeners ---
+
+    def wrap_listener(self, func, event):
+        if METRICS_SAMPLE_RATE <= 0:
+            return func
+        owner = getattr(func, '__self__', None)
+        name = f"{type(owner).__name__}.{func.__name__}" if owner is not None else func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with self.timer('listener', name):
+                return await func(*args, **kwargs)
+
+        self._wrappers[(func, event)] = wrapper
+        return wrapper
+
+    def unwrap_listener(self, func, event):
+        return self._wrappers.pop((func, event), func)
+
+    # --- Background: loop lag + HTTP endpoint ---
+
+    async def start(self, bot):
+        if METRICS_SAMPLE_RATE > 0 and self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._measure_loop_lag())
+        if METRICS_PORT and self._runner is None:
+            app = web.Application()
+
+            async def handle(request):
+                return web.Response(text=self.render_prometheus(bot), content_type='text/plain')
+
+            app.router.add_get('/metrics', handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, '127.0.0.1', METRICS_PORT).start()
+            print(f'Metrics endpoint: http://127.0.0.1:{METRICS_PORT}/metrics')
+
+    async def stop(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _measure_loop_lag(self):
+        # الـ sleep يتأخر عن موعده بقدر انشغال الـ loop بمهام أخرى
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self.loop_lag.observe(max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL))
+
+    def gauges(self, bot):
+        # استيراد متأخر: database نفسه يستخدم Histogram من هنا
+        import database
+        import ratelimit
+        values = {
+            'guilds': len(bot.guilds),
+            'gateway_latency_seconds': 0.0 if math.isnan(bot.latency) else bot.latency,
+        }
+        for name, size in ratelimit.sizes().items():
+            values[f'ratelimit_keys{{store="{name}"}}'] = size
+        for key, value in database.settings_cache.stats().items():
+            values[f'settings_cache_{key}'] = value
+        logging_cog = bot.get_cog('Logging')
+        if logging_cog:
+            for key, value in logging_cog.log_stats.items():
+                values[f'log_embeds_{key}'] = value
+        return values
+
+    def render_prometheus(self, bot):
+        lines = ['# TYPE thex_latency_seconds summary']
+        for (kind, name), histogram in sorted(self.histograms.items()):
+            labels = f'kind="{kind}",name="{name}"'
+            for q in (50, 90, 99):
+                lines.append(f'thex_latency_seconds{{{labels},quantile="{q / 100}"}} {histogram.percentile(q):.6f}')
+            lines.append(f'thex_latency_seconds_sum{{{labels}}} {histogram.total:.6f}')
+            lines.append(f'thex_latency_seconds_count{{{labels}}} {histogram.count}')
+        lines.append('# TYPE thex_errors_total counter')
+        for (kind, name), count in sorted(self.errors.items()):
+            lines.append(f'thex_errors_total{{kind="{kind}",name="{name}"}} {count}')
+        import database
+        lines.append('# TYPE thex_db_query_seconds summary')
+        for query, stats in database.query_profiler.top(limit=50):
+            labels = 'query="' + query[:120].replace('\\', '\\\\').replace('"', '\\"') + '"'
+            for q in (50, 99):
+                lines.append(f'thex_db_query_seconds{{{labels},quantile="{q / 100}"}} {stats.latency.percentile(q):.6f}')
+            lines.append(f'thex_db_query_seconds_sum{{{labels}}} {stats.latency.total:.6f}')
+            lines.append(f'thex_db_query_seconds_count{{{labels}}} {stats.latency.count}')
+            lines.append(f'thex_db_query_wait_seconds_sum{{{labels}}} {stats.wait.total:.6f}')
+            lines.append(f'thex_db_query_rows_total{{{labels}}} {stats.rows}')
+        lines.append('# TYPE thex_loop_lag_seconds summary')
+        for q in (50, 90, 99):
+            lines.append(f'thex_loop_lag_seconds{{quantile="{q / 100}"}} {self.loop_lag.percentile(q):.6f}')
+        lines.append(f'thex_loop_lag_seconds_sum {self.loop_lag.total:.6f}')
+        lines.append(f'thex_loop_lag_seconds_count {self.loop_lag.count}')
+        for name, value in self.gauges(bot).items():
+            lines.append(f'thex_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+class _Timer:
+    __slots__ = ('metrics', 'kind', 'name', 'start')
+
+    def __init__(self, metrics, kind, name):
+        self.metrics = metrics
+        self.kind = kind
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if self.metrics.sampled():
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and not issubclass(exc_type, asyncio.CancelledError):
+            self.metrics.error(self.kind, self.name)
+        if self.start is not None:
+            self.metrics.observe(self.kind, self.name, time.perf_counter() - self.start)
+        return False
+
+metrics = Metrics()
+
+class InstrumentedTree(app_commands.CommandTree):
+    # القياس داخل الـ tree نفسه وليس في tree.on_error، لأن الإضافات تستبدل on_error (التذاكر مثلاً عند إعادة تحميلها)
+    async def interaction_check(self, interaction):
+        if METRICS_SAMPLE_RATE > 0 and metrics.sampled():
+            interaction.extras['metrics_start'] = time.perf_counter()
+        return True
+
+    async def _call(self, interaction):
+        # _call ينفذ الأمر ثم on_error عند الفشل، فنتيجته النهائية في command_failed
+        try:
+            await super()._call(interaction)
+        except Exception:
+            record_app_command(interaction, failed=True)
+            raise
+        if interaction.type is not discord.InteractionType.autocomplete:
+            record_app_command(interaction, failed=interaction.command_failed)
+
+def record_app_command(interaction, failed=False):
+    command = interaction.command
+    name = command.qualified_name if command else 'unknown'
+    if failed:
+        metrics.error('app_command', name)
+    start = interaction.extras.get('metrics_start')
+    if start is not None:
+        metrics.observe('app_command', name, time.perf_counter() - start)
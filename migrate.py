@@ -1,8 +1,12 @@
-import asyncio
-import database
-
-async def run_migration():
-    await database.init_db()
-    print("Migration check done.")
-
-asyncio.run(run_migration())
+import asyncio
+import database
+
+async def run_migration():
+    try:
+        await database.init_db()
+        print("Migration check done.")
+    finally:
+        # اتصال SQLite يعمل على thread لا ينتهي إلا بإغلاقه
+        await database.close_db()
+
+asyncio.run(run_migration())
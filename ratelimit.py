@@ -0,0 +1,120 @@
+import time
+from collections import deque
+
+# name -> store، لعرض حجم كل واحد منها كمقياس
+_stores = {}
+
+def sizes():
+    return {name: len(store) for name, store in _stores.items()}
+
+class CooldownStore:
+    # Cooldown لكل مفتاح مع انتهاء صلاحية على شكل دلاء زمنية (buckets):
+    # المفتاح يوضع في دلو حسب وقت انتهائه، ومع مرور الوقت تُحذف الدلاء المنتهية بالكامل
+    # فلا يبقى في الذاكرة إلا من عليه cooldown فعلاً
+    __slots__ = ('duration', 'resolution', '_expires', '_buckets', '_current_bucket')
+
+    def __init__(self, duration, resolution=None, name=None):
+        self.duration = duration
+        self.resolution = resolution or max(duration / 60, 1)
+        self._expires = {} # key -> وقت الانتهاء (monotonic)
+        self._buckets = {} # رقم الدلو -> المفاتيح التي تنتهي فيه
+        self._current_bucket = None
+        if name:
+            _stores[name] = self
+
+    def _expire(self, now):
+        current = int(now // self.resolution)
+        last = self._current_bucket
+        if last is None or current <= last:
+            self._current_bucket = current if last is None else last
+            return
+        # بعد فترة خمول طويلة نمر على الدلاء الموجودة فقط بدل كل الأرقام بينها
+        if current - last > len(self._buckets):
+            expired = [bucket for bucket in self._buckets if bucket < current]
+        else:
+            expired = range(last, current)
+        for bucket in expired:
+            for key in self._buckets.pop(bucket, ()):
+                expires = self._expires.get(key)
+                # المفتاح ربما تجدد ونُقل لدلو لاحق
+                if expires is not None and expires <= now:
+                    del self._expires[key]
+        self._current_bucket = current
+
+    def remaining(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        expires = self._expires.get(key)
+        if expires is None or expires <= now:
+            return 0
+        return expires - now
+
+    def start(self, key, duration=None, now=None):
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        expires = now + (self.duration if duration is None else duration)
+        self._expires[key] = expires
+        self._buckets.setdefault(int(expires // self.resolution), []).append(key)
+
+    def acquire(self, key, now=None):
+        # True إذا لم يكن على المفتاح cooldown، ويبدأ له cooldown جديد
+        now = time.monotonic() if now is None else now
+        if self.remaining(key, now):
+            return False
+        self.start(key, now=now)
+        return True
+
+    def reset(self, key):
+        self._expires.pop(key, None)
+
+    def __contains__(self, key):
+        return self.remaining(key) > 0
+
+    def __len__(self):
+        return len(self._expires)
+
+class SlidingWindow:
+    # آخر limit توقيتات فقط (ring buffer)، فالذاكرة ثابتة لكل مفتاح
+    __slots__ = ('hits', 'window')
+
+    def __init__(self, limit, window):
+        self.hits = deque(maxlen=limit)
+        self.window = window
+
+    def hit(self, now):
+        self.hits.append(now)
+        return len(self.hits) == self.hits.maxlen and now - self.hits[0] <= self.window
+
+    def idle(self, now):
+        return not self.hits or now - self.hits[-1] > self.window
+
+class WindowCounter:
+    # مفتاح -> SlidingWindow، والمفاتيح الخاملة تُحذف مرة كل window ثانية
+    def __init__(self, limit, window, name=None):
+        self.limit = limit
+        self.window = window
+        self.windows = {}
+        self._next_prune = 0
+        if name:
+            _stores[name] = self
+
+    def hit(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        window = self.windows.get(key)
+        if window is None:
+            window = self.windows[key] = SlidingWindow(self.limit, self.window)
+        triggered = window.hit(now)
+        if triggered:
+            # يبدأ العد من جديد حتى لا تتكرر العقوبة مع كل رسالة تالية
+            window.hits.clear()
+        if now >= self._next_prune:
+            self.prune(now)
+        return triggered
+
+    def prune(self, now):
+        self._next_prune = now + self.window
+        for key in [key for key, window in self.windows.items() if window.idle(now)]:
+            del self.windows[key]
+
+    def __len__(self):
+        return len(self.windows)